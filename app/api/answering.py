@@ -696,7 +696,7 @@ async def process_answer_request(
         f"top_k={top_k_value}_"
         f"temp={prompt_settings.default_temperature}_"
         f"max_tokens={getattr(prompt_settings, 'default_max_tokens', None)}_"
-        f"supported={','.join(sorted(prompt_settings.supported_languages))}_"
+        f"supported={prompt_settings.supported_languages_key}_"
         f"fallback={prompt_settings.fallback_language}_"
         f"rerank={reranking_enabled}_"
         f"detector={detector_version}_"
@@ -714,8 +714,13 @@ async def process_answer_request(
         logger.debug(f"[{request_id}] Cache hit for query")
         latency_ms = int((time_func() - start_time) * 1000)
         
-        # Update conversation_id in cached response
-        cached_result.conversation_id = conversation_id
+        # Update conversation_id on a shallow copy (the cached entry is shared between requests)
+        cached_result = cached_result.model_copy(
+            update={
+                "conversation_id": conversation_id,
+                "metrics": cached_result.metrics.model_copy(update={"cache_hit": True}),
+            }
+        )
         
         # Save to conversation history if DB available
         if db_sessionmaker:
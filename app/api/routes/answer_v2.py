@@ -5,9 +5,9 @@ V2 answer endpoint (DocsGPT-like).
 import logging
 from typing import Optional
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
-from app.api.schemas.v2 import AnswerRequest, AnswerResponse, ErrorResponseV2
+from app.api.schemas.v2 import AnswerRequest, AnswerResponse, ErrorResponseV2, answer_response_json
 from app.core.prompt_config import load_prompt_settings_from_env
 from app.services.answer_service import AnswerService
 from app.services.conversation_service import ConversationService
@@ -150,7 +150,8 @@ async def answer_question(request_data: AnswerRequest, request: Request):
             query_requests_total.labels(status="success").inc()
             query_latency_seconds.observe(response.metrics.latency_ms / 1000.0)
         
-        return response
+        # Serialize directly (skips response_model re-validation; cached entries are pre-encoded)
+        return Response(content=answer_response_json(response), media_type="application/json")
         
     except Exception as e:
         logger.error(f"[{request_id}] Error processing answer request: {e}", exc_info=True)
@@ -2,15 +2,68 @@
 Prometheus metrics endpoint.
 """
 
-from fastapi import APIRouter, Response
+import asyncio
+import gzip
+
+from fastapi import APIRouter, Request, Response
 from app.infra.metrics import get_metrics_response
 
 router = APIRouter()
 
+# Bodies below this size are not worth the gzip framing overhead
+_GZIP_MIN_BYTES = 1024
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Check whether an Accept-Encoding header allows gzip (RFC 9110 q-values).
+    
+    An explicit "gzip" entry wins over "*"; "gzip;q=0" means not acceptable.
+    """
+    gzip_q = None
+    wildcard_q = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard_q = q
+        else:
+            gzip_q = q if gzip_q is None else max(gzip_q, q)
+    if gzip_q is not None:
+        return gzip_q > 0
+    return wildcard_q is not None and wildcard_q > 0
+
 
 @router.get("/metrics")
-async def metrics_endpoint():
+async def metrics_endpoint(request: Request):
     """Metrics endpoint Prometheus."""
     content, content_type = get_metrics_response()
-    return Response(content=content, media_type=content_type)
 
+    # Prometheus text format (histogram buckets) is highly repetitive and
+    # compresses to a small fraction of its size; scrapers send gzip by default
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if (
+        isinstance(content, bytes)
+        and len(content) >= _GZIP_MIN_BYTES
+        and _accepts_gzip(accept_encoding)
+    ):
+        # Compress off the event loop; large registries take a few ms
+        compressed = await asyncio.to_thread(gzip.compress, content, compresslevel=5)
+        return Response(
+            content=compressed,
+            media_type=content_type,
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+
+    # Response depends on Accept-Encoding either way; keep caches from mixing them
+    return Response(content=content, media_type=content_type, headers={"Vary": "Accept-Encoding"})
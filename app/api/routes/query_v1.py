@@ -104,7 +104,7 @@ async def query_documentation(query: Query, request: Request):
             f"top_k={prompt_settings.default_top_k}_"
             f"temp={prompt_settings.default_temperature}_"
             f"max_tokens={getattr(prompt_settings, 'default_max_tokens', None)}_"
-            f"supported={','.join(sorted(prompt_settings.supported_languages))}_"
+            f"supported={prompt_settings.supported_languages_key}_"
             f"fallback={prompt_settings.fallback_language}_"
             f"rerank={reranking_enabled}_"
             f"detector={detector_version}_"
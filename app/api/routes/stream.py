@@ -11,10 +11,11 @@ from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 
 from app.api.schemas.v2 import AnswerRequest, SSEEvent, ErrorPayload, MetricsPayload
-from app.core.prompt_config import load_prompt_settings_from_env
+from app.core.prompt_config import load_prompt_settings_from_env, with_mode
 from app.services.answer_service import AnswerService
 from app.services.conversation_service import ConversationService
 from app.services.prompt_service import PromptService
+from app.infra.json_utils import dumps
 from app.infra.rate_limit import query_limiter
 from app.infra.metrics import (
     rate_limit_hits_total,
@@ -51,6 +52,15 @@ def validate_api_key(api_key: Optional[str]) -> bool:
     return api_key in allowed_keys
 
 
+def sse_frame(event: SSEEvent) -> bytes:
+    """
+    Serialize SSE event into a `data:` frame.
+    
+    Returns bytes so StreamingResponse passes them to ASGI send as-is.
+    """
+    return b"data: " + dumps(event.model_dump(mode="json")) + b"\n\n"
+
+
 def chunk_text_for_streaming(text: str, chunk_size: int = 80) -> List[str]:
     """
     Split text into chunks for pseudo-streaming (fallback only).
@@ -81,7 +91,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                     request_id=request_id
                 )
             )
-            yield f"data: {error_event.json()}\n\n"
+            yield sse_frame(error_event)
         
         return StreamingResponse(error_stream(), media_type="text/event-stream")
     
@@ -101,7 +111,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                     request_id=request_id
                 )
             )
-            yield f"data: {error_event.json()}\n\n"
+            yield sse_frame(error_event)
         
         return StreamingResponse(rate_limit_stream(), media_type="text/event-stream")
     
@@ -117,7 +127,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                     request_id=request_id
                 )
             )
-            yield f"data: {error_event.json()}\n\n"
+            yield sse_frame(error_event)
         
         return StreamingResponse(unavailable_stream(), media_type="text/event-stream")
     
@@ -157,20 +167,8 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
             # Update prompt_settings mode based on effective_preset
             # strict preset -> mode="strict", others -> mode="helpful"
             effective_mode = "strict" if effective_preset == "strict" else "helpful"
-            if prompt_settings.mode != effective_mode:
-                # Create new PromptSettings with updated mode
-                from app.core.prompt_config import PromptSettings
-                prompt_settings = PromptSettings(
-                    supported_languages=prompt_settings.supported_languages,
-                    fallback_language=prompt_settings.fallback_language,
-                    base_docs_url=prompt_settings.base_docs_url,
-                    not_found_message=prompt_settings.not_found_message,
-                    include_sources_in_text=prompt_settings.include_sources_in_text,
-                    mode=effective_mode,
-                    default_temperature=prompt_settings.default_temperature,
-                    default_top_k=prompt_settings.default_top_k,
-                    default_max_tokens=prompt_settings.default_max_tokens
-                )
+            # Reuse cached PromptSettings with updated mode
+            prompt_settings = with_mode(prompt_settings, effective_mode)
             
             # Get database sessionmaker
             db_sessionmaker = getattr(request.app.state, "db_sessionmaker", None)
@@ -217,12 +215,10 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
             # Build context hint
             context_hint_dict = None
             if request_data.context_hint:
-                context_hint_dict = request_data.context_hint.dict()
+                context_hint_dict = request_data.context_hint.model_dump()
             
-            # Build passthrough
-            passthrough_dict = {}
-            if request_data.passthrough:
-                passthrough_dict.update(request_data.passthrough)
+            # Build passthrough (once; reused for language selection and prompt rendering)
+            passthrough_dict = dict(request_data.passthrough) if request_data.passthrough else {}
             if context_hint_dict:
                 passthrough_dict.update(context_hint_dict)
             
@@ -253,8 +249,9 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
             # Stream answer using real streaming
             # Note: generate_answer_stream now handles Jinja2 template rendering internally
             stream_flush_chars = int(os.getenv("STREAM_FLUSH_EVERY_N_CHARS", "15"))
+            id_sent = False
             sources_sent = False
-            full_answer = ""
+            answer_parts: List[str] = []
             final_sources = []
             final_not_found = False
             retrieved_chunks_from_context = None
@@ -265,7 +262,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
             prompt_render_ms = None
             llm_connect_ms = None
             
-            async for token_delta, sources, not_found, context_info in answer_service.generate_answer_stream(
+            async for frame in answer_service.generate_answer_stream(
                 rag_chain,
                 request_data.question,
                 request_id,
@@ -277,33 +274,36 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                 system_prompt=None,  # Let generate_answer_stream build it via Jinja2
                 vectorstore=vectorstore,
                 stream_flush_chars=stream_flush_chars,
-                preset_override=effective_preset
+                preset_override=effective_preset,
+                endpoint_name="stream",
+                system_namespace=system_namespace_preview,
+                passthrough=passthrough_dict
             ):
-                # Extract timing metrics and retrieved_chunks from context_info
-                if context_info:
-                    if "retrieval_ms" in context_info:
-                        retrieval_ms = context_info["retrieval_ms"]
-                    if "embed_query_ms" in context_info:
-                        embed_query_ms = context_info["embed_query_ms"]
-                    if "vector_search_ms" in context_info:
-                        vector_search_ms = context_info["vector_search_ms"]
-                    if "format_sources_ms" in context_info:
-                        format_sources_ms = context_info["format_sources_ms"]
-                    if "prompt_render_ms" in context_info:
-                        prompt_render_ms = context_info["prompt_render_ms"]
-                    if "llm_connect_ms" in context_info:
-                        llm_connect_ms = context_info["llm_connect_ms"]
-                    if "retrieved_chunks" in context_info:
-                        retrieved_chunks_from_context = context_info["retrieved_chunks"]
+                # Frame object is reused by the generator: read its fields now
+                token_delta = frame.chunk
+                sources = frame.sources
+                not_found = frame.not_found
+                stream_metrics = frame.metrics
+                
+                # Extract timing metrics and retrieved_chunks from stream metrics
+                if stream_metrics is not None:
+                    retrieval_ms = stream_metrics.retrieval_ms
+                    embed_query_ms = stream_metrics.embed_query_ms
+                    vector_search_ms = stream_metrics.vector_search_ms
+                    format_sources_ms = stream_metrics.format_sources_ms
+                    prompt_render_ms = stream_metrics.prompt_render_ms
+                    llm_connect_ms = stream_metrics.llm_connect_ms
+                    retrieved_chunks_from_context = stream_metrics.retrieved_chunks
                 
-                # Send ID event on first yield (before any tokens)
-                if first_token_time is None:
+                # Send ID event once, on first yield (before sources and tokens)
+                if not id_sent:
                     id_event = SSEEvent(
                         type="id",
                         conversation_id=conversation_id,
                         request_id=request_id
                     )
-                    yield f"data: {id_event.json()}\n\n"
+                    yield sse_frame(id_event)
+                    id_sent = True
                 
                 # Send sources as soon as they're available (before or with first token)
                 # Note: sources are yielded from generate_answer_stream after retrieval
@@ -313,7 +313,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                             type="source",
                             source=source
                         )
-                        yield f"data: {source_event.json()}\n\n"
+                        yield sse_frame(source_event)
                     sources_sent = True
                     final_sources = sources
                     logger.debug(f"[{request_id}] Sent {len(sources)} sources in SSE stream")
@@ -332,12 +332,12 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                             # We can't get exact prompt size here, but we can log it if available
                             pass
                     
-                    full_answer += token_delta
+                    answer_parts.append(token_delta)
                     answer_event = SSEEvent(
                         type="answer",
                         delta=token_delta
                     )
-                    yield f"data: {answer_event.json()}\n\n"
+                    yield sse_frame(answer_event)
                 
                 # Update final status and sources (from any yield)
                 final_not_found = not_found
@@ -351,7 +351,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
             total_latency_ms = int((time_func() - start_time) * 1000)
             
             # Ensure retrieved_chunks=0 for strict miss (when sources are empty)
-            # Use retrieved_chunks from context_info if available (for strict miss), otherwise count sources
+            # Use retrieved_chunks from stream metrics if available (for strict miss), otherwise count sources
             if retrieved_chunks_from_context is not None:
                 retrieved_chunks_count = retrieved_chunks_from_context
             else:
@@ -398,15 +398,17 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                 f"breakdown=[{breakdown_str}]"
             )
             
-            # Save to conversation history
-            await answer_service.conversation_service.append_message(conversation_id, "user", request_data.question)
-            await answer_service.conversation_service.append_message(conversation_id, "assistant", full_answer)
+            # Save to conversation history (single transaction, don't delay the end event)
+            answer_service.conversation_service.append_messages_background(
+                conversation_id,
+                [("user", request_data.question), ("assistant", "".join(answer_parts))]
+            )
             
             end_event = SSEEvent(
                 type="end",
                 metrics=metrics
             )
-            yield f"data: {end_event.json()}\n\n"
+            yield sse_frame(end_event)
             
         except Exception as e:
             logger.error(f"[{request_id}] Error in stream: {e}", exc_info=True)
@@ -418,7 +420,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                     request_id=request_id
                 )
             )
-            yield f"data: {error_event.json()}\n\n"
+            yield sse_frame(error_event)
             
             # Send end event after error
             end_event = SSEEvent(
@@ -431,7 +433,7 @@ async def stream_answer(request_data: AnswerRequest, request: Request):
                     ttft_ms=ttft_ms
                 )
             )
-            yield f"data: {end_event.json()}\n\n"
+            yield sse_frame(end_event)
     
     return StreamingResponse(generate_stream(), media_type="text/event-stream")
 
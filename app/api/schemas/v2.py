@@ -2,12 +2,13 @@
 Pydantic models for v2 API (DocsGPT-like interface).
 """
 
+import copy
 import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 
 logger = logging.getLogger(__name__)
 
@@ -129,6 +130,41 @@ class AnswerResponse(BaseModel):
     usage: Optional[Dict[str, Any]] = Field(None, description="Token usage (reserved)")
     debug: Optional[Dict[str, Any]] = Field(None, description="Debug information")
     
+    # Pre-encoded JSON of the response without conversation_id (set on cached entries),
+    # paired with a deep copy of the field values it was encoded from
+    _cached_body: Optional[Tuple[bytes, Tuple[Any, ...]]] = PrivateAttr(default=None)
+    
+    def _body_fields(self) -> Tuple[Any, ...]:
+        """Field values covered by the pre-encoded body (everything but conversation_id)."""
+        return tuple(v for k, v in self.__dict__.items() if k != "conversation_id")
+    
+    def prepare_cached_body(self) -> None:
+        """Pre-encode the response (minus conversation_id) for fast serialization on cache hits."""
+        body = self.model_dump_json(exclude={"conversation_id"}).encode()
+        # Deep copy: in-place changes to nested models/dicts must not reach the snapshot
+        self._cached_body = (body, copy.deepcopy(self._body_fields()))
+    
+    def cached_body(self) -> Optional[bytes]:
+        """
+        Get the pre-encoded body if it still matches this response.
+        
+        model_copy() carries private attributes along, so a copy that updated any
+        field other than conversation_id would otherwise reuse stale bytes. Fields
+        are compared by value against a snapshot taken at encode time, which also
+        catches in-place changes to nested models (e.g. metrics.latency_ms = ...).
+        Unchanged strings are shared with the snapshot, so the comparison stays
+        far cheaper than re-encoding.
+        
+        Returns:
+            Pre-encoded body without conversation_id, or None if missing or stale
+        """
+        if self._cached_body is None:
+            return None
+        body, fields = self._cached_body
+        if self._body_fields() != fields:
+            return None
+        return body
+    
     class Config:
         json_schema_extra = {
             "example": {
@@ -176,6 +212,27 @@ class ErrorResponseV2(BaseModel):
     code: Optional[str] = None
 
 
+def answer_response_json(response: AnswerResponse) -> bytes:
+    """
+    Serialize AnswerResponse to JSON bytes.
+    
+    Cached responses carry a pre-encoded body, so only conversation_id
+    (which differs per request) is serialized on a cache hit.
+    
+    Args:
+        response: Answer response
+        
+    Returns:
+        JSON document as bytes
+    """
+    body = response.cached_body()
+    if body is None:
+        return response.model_dump_json().encode()
+    conversation_id_json = json.dumps(response.conversation_id).encode()
+    # body is a non-empty JSON object: splice conversation_id in after the opening brace
+    return b'{"conversation_id":' + conversation_id_json + b"," + body[1:]
+
+
 def parse_history_to_text(history: Optional[Union[str, List[Union[Dict[str, str], Dict[str, Any]]]]], max_length: int = 6000) -> str:
     """
     Parse history into compact text format for prompt.
@@ -5,6 +5,7 @@ Functions for extracting sections, anchors and improved chunking.
 """
 
 import re
+from functools import lru_cache
 from typing import List, Tuple, Optional
 
 
@@ -108,6 +109,7 @@ def find_section_for_text(text: str, position: int) -> Tuple[Optional[str], Opti
     return last_title, last_level, last_anchor
 
 
+@lru_cache(maxsize=8192)
 def build_doc_url(base_url: str, source: str, section_anchor: Optional[str] = None) -> str:
     """
     Builds full document URL with optional section anchor.
@@ -119,6 +121,8 @@ def build_doc_url(base_url: str, source: str, section_anchor: Optional[str] = No
         
     Returns:
         Full URL (e.g., "https://docs.aqtra.io/app-development/button.html#primary-button")
+    
+    Results are memoized (bounded LRU): the same source paths recur across requests.
     """
     # Remove docs/ prefix if present
     if source.startswith("docs/"):
@@ -7,14 +7,15 @@ Supports both legacy and Jinja2 template modes.
 
 import os
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from pathlib import Path
 from typing import Literal, Optional
 
 
-@dataclass
+@dataclass(frozen=True)
 class PromptSettings:
-    """Prompt settings and RAG assistant behavior."""
+    """Prompt settings and RAG assistant behavior (immutable, hashable)."""
     supported_languages: tuple[str, ...] = ("en", "de", "fr", "es", "pt")
     fallback_language: Literal["en"] = "en"
     base_docs_url: str = "https://docs.aqtra.io/"
@@ -26,6 +27,31 @@ class PromptSettings:
     # Maximum number of tokens for LLM response by default.
     # Balanced default suitable for technical documentation.
     default_max_tokens: int = 1200
+    # Sorted, comma-joined supported_languages (precomputed for cache keys)
+    supported_languages_key: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "supported_languages_key", ",".join(sorted(self.supported_languages)))
+
+
+@lru_cache(maxsize=32)
+def with_mode(settings: PromptSettings, mode: str) -> PromptSettings:
+    """
+    Returns settings with the given mode.
+    
+    Instances are cached per (settings, mode), so switching mode per request
+    (e.g. for presets) does not allocate a new PromptSettings every time.
+    
+    Args:
+        settings: Base prompt settings
+        mode: Target mode ("strict" or "helpful")
+        
+    Returns:
+        settings itself if mode already matches, otherwise a cached copy with updated mode
+    """
+    if settings.mode == mode:
+        return settings
+    return replace(settings, mode=mode)
 
 
 def load_prompt_settings_from_env() -> PromptSettings:
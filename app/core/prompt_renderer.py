@@ -5,9 +5,11 @@ Provides sandboxed template rendering with namespaces (system/source/passthrough
 and size limits.
 """
 
+import json
 import logging
 import os
 import re
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 try:
@@ -41,6 +43,7 @@ DEFAULT_STRICT_UNDEFINED = os.getenv("PROMPT_STRICT_UNDEFINED", "1").lower() in
 DEFAULT_MAX_DEPTH = 6
 DEFAULT_MAX_ITEMS = 200
 DEFAULT_MAX_STRING_LEN = 2000
+TEMPLATE_CACHE_SIZE = 64
 
 
 def sanitize_passthrough(obj: Any, depth: int = 0, max_depth: int = DEFAULT_MAX_DEPTH) -> Any:
@@ -147,6 +150,63 @@ def truncate_chars(value: Any, n: int = 400) -> str:
     return s[:n] + "..."
 
 
+def _tojson(value: Any) -> str:
+    """Serialize value to JSON without escaping non-ASCII characters."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+@lru_cache(maxsize=2)
+def get_environment(strict_undefined: bool) -> SandboxedEnvironment:
+    """
+    Get shared sandboxed environment for the given undefined mode.
+    
+    Environments are created once per process so that compiled templates
+    can be reused across PromptRenderer/PromptService instances.
+    
+    Args:
+        strict_undefined: If True, raise error on undefined variables
+        
+    Returns:
+        Configured SandboxedEnvironment
+    """
+    undefined_class = StrictUndefined if strict_undefined else Undefined
+    env = SandboxedEnvironment(
+        autoescape=True,
+        undefined=undefined_class,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=False,
+        cache_size=400
+    )
+    
+    # Add custom filters
+    env.filters['truncate_chars'] = truncate_chars
+    env.filters['safe_newlines'] = safe_newlines
+    env.filters['tojson'] = _tojson
+    return env
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template_str: str, strict_undefined: bool):
+    """
+    Compile template string (cached).
+    
+    Template bodies are loaded from disk/env and rarely change, so parsing and
+    compiling them on every request is wasted work.
+    
+    Args:
+        template_str: Jinja2 template string (legacy placeholders already converted)
+        strict_undefined: Undefined mode of the environment to compile with
+        
+    Returns:
+        Compiled jinja2 Template
+        
+    Raises:
+        TemplateSyntaxError: If template has syntax errors (not cached)
+    """
+    return get_environment(strict_undefined).from_string(template_str)
+
+
 class PromptRenderer:
     """
     Safe Jinja2 prompt renderer with namespaces and size limits.
@@ -170,23 +230,8 @@ class PromptRenderer:
         self.max_chars = max_chars
         self.strict_undefined = strict_undefined
         
-        # Create sandboxed environment
-        undefined_class = StrictUndefined if strict_undefined else Undefined
-        self.env = SandboxedEnvironment(
-            autoescape=True,
-            undefined=undefined_class,
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
-        
-        # Add custom filters
-        self.env.filters['truncate_chars'] = truncate_chars
-        self.env.filters['safe_newlines'] = safe_newlines
-        try:
-            import json
-            self.env.filters['tojson'] = lambda x: json.dumps(x, ensure_ascii=False)
-        except ImportError:
-            pass
+        # Shared sandboxed environment (one per undefined mode)
+        self.env = get_environment(strict_undefined)
     
     def validate_template(self, template_str: str) -> None:
         """
@@ -250,7 +295,7 @@ class PromptRenderer:
         
         # Compile and render
         try:
-            template = self.env.from_string(template_str)
+            template = compile_template(template_str, self.strict_undefined)
             rendered = template.render(**context)
         except (TemplateSyntaxError, UndefinedError) as e:
             logger.error(f"Template render error: {e}")
@@ -37,7 +37,9 @@ class LRUCache:
         """
         normalized_question = question.strip().lower()[:500]  # Limit length
         key_data = f"{normalized_question}|{settings_signature}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        # blake2b with a 16-byte digest keeps the 32-hex-char key format of md5
+        # but hashes faster on modern CPUs
+        return hashlib.blake2b(key_data.encode(), digest_size=16).hexdigest()
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -50,7 +52,7 @@ class LRUCache:
             Value or None if not found or expired
         """
         # Log cache access (hash only, no sensitive data)
-        key_hash = hashlib.sha256(key.encode()).hexdigest()[:12]
+        key_hash = hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
         cache_size = len(self.cache)
         
         if key not in self.cache:
@@ -79,7 +81,7 @@ class LRUCache:
             value: Value to save
         """
         # Log cache write (hash only, no sensitive data)
-        key_hash = hashlib.sha256(key.encode()).hexdigest()[:12]
+        key_hash = hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
         size_before = len(self.cache)
         
         # Remove old entries if limit reached
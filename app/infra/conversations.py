@@ -5,7 +5,7 @@ Conversation history management for v2 API.
 import logging
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
@@ -154,3 +154,52 @@ async def append_message(
     except Exception as e:
         logger.warning(f"Error appending message to {conversation_id}: {e}")
 
+
+async def append_messages(
+    sessionmaker: Optional[async_sessionmaker[AsyncSession]],
+    conversation_id: str,
+    messages: Sequence[Tuple[str, str]]
+):
+    """
+    Append several messages to conversation history in one transaction.
+    
+    Args:
+        sessionmaker: Database sessionmaker (can be None)
+        conversation_id: Conversation ID
+        messages: Sequence of (role, content) tuples, saved in order
+    """
+    if not sessionmaker:
+        return
+    
+    valid_messages = []
+    for role, content in messages:
+        if role not in ("user", "assistant"):
+            logger.warning(f"Invalid role: {role}, skipping message save")
+            continue
+        valid_messages.append((role, content))
+    if not valid_messages:
+        return
+    
+    try:
+        async with sessionmaker() as session:
+            # Update conversation updated_at
+            result = await session.execute(
+                select(Conversation).where(Conversation.conversation_id == conversation_id)
+            )
+            conv = result.scalar_one_or_none()
+            if conv:
+                conv.updated_at = datetime.utcnow()
+            
+            # Add messages
+            session.add_all([
+                ConversationMessage(
+                    conversation_id=conversation_id,
+                    role=role,
+                    content=content
+                )
+                for role, content in valid_messages
+            ])
+            await session.commit()
+            logger.debug(f"Appended {len(valid_messages)} messages to conversation {conversation_id}")
+    except Exception as e:
+        logger.warning(f"Error appending messages to {conversation_id}: {e}")
@@ -0,0 +1,39 @@
+"""
+Fast JSON serialization helpers.
+
+Uses orjson when installed (much faster on small dicts such as SSE frames),
+falls back to stdlib json with equivalent compact output otherwise.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """Fallback serializer for numpy scalars and other objects with .item()."""
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize object to compact UTF-8 JSON bytes.
+
+    Args:
+        obj: JSON-compatible object (dict, list, str, numbers, None)
+
+    Returns:
+        JSON document as bytes
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
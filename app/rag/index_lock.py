@@ -10,6 +10,22 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+_NS_PER_SECOND = 1_000_000_000
+
+
+def _parse_timestamp_ns(value: str) -> int:
+    """
+    Parse lock file timestamp as integer nanoseconds since the epoch.
+    
+    Lock files written by older versions store float seconds; those are
+    converted so a lock left over from before an upgrade is still aged.
+    """
+    value = value.strip()
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value) * _NS_PER_SECOND)
+
 
 class IndexLock:
     """File-based lock for atomic index operations."""
@@ -39,10 +55,11 @@ class IndexLock:
         Returns:
             True if lock acquired, False if timeout
         """
-        start_time = time.time()
+        # Local wait budget: monotonic clock is immune to wall-clock jumps
+        deadline = time.monotonic() + self.timeout_seconds
         spin_interval = 0.5  # Check every 500ms
         
-        while time.time() - start_time < self.timeout_seconds:
+        while time.monotonic() < deadline:
             try:
                 # Try to create lock file exclusively (O_CREAT | O_EXCL)
                 # On Unix, this is atomic
@@ -51,10 +68,11 @@ class IndexLock:
                     os.O_CREAT | os.O_EXCL | os.O_WRONLY
                 )
                 
-                # Write PID and timestamp
+                # Write PID and timestamp (integer ns since epoch; wall clock
+                # because other processes must be able to age the lock)
                 pid = os.getpid()
-                timestamp = time.time()
-                lock_content = f"{pid}\n{timestamp}\n"
+                timestamp_ns = time.time_ns()
+                lock_content = f"{pid}\n{timestamp_ns}\n"
                 os.write(self.lock_fd, lock_content.encode())
                 os.fsync(self.lock_fd)
                 
@@ -106,12 +124,12 @@ class IndexLock:
                 lines = f.readlines()
                 if len(lines) >= 2:
                     pid = lines[0].strip()
-                    timestamp = float(lines[1].strip())
-                    age_seconds = time.time() - timestamp
+                    timestamp_ns = _parse_timestamp_ns(lines[1])
+                    age_ns = time.time_ns() - timestamp_ns
                     return {
                         "pid": pid,
-                        "timestamp": timestamp,
-                        "age_seconds": round(age_seconds, 2)
+                        "timestamp": timestamp_ns / _NS_PER_SECOND,
+                        "age_seconds": round(age_ns / _NS_PER_SECOND, 2)
                     }
         except Exception as e:
             logger.warning(f"Error reading lock info: {e}")
@@ -148,10 +166,10 @@ class IndexLock:
             with open(self.lock_file, 'r') as f:
                 lines = f.readlines()
                 if len(lines) >= 2:
-                    timestamp = float(lines[1].strip())
-                    age = time.time() - timestamp
+                    timestamp_ns = _parse_timestamp_ns(lines[1])
+                    age_ns = time.time_ns() - timestamp_ns
                     # Consider stale if older than timeout * 2
-                    return age > (self.timeout_seconds * 2)
+                    return age_ns > self.timeout_seconds * 2 * _NS_PER_SECOND
         except Exception as e:
             logger.warning(f"Error checking lock staleness: {e}")
         
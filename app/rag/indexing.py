@@ -534,35 +534,38 @@ def build_or_load_vectorstore(
             else:
                 project_root = Path(__file__).parent.parent.parent
                 backup_path = project_root / f"{index_path}.bak"
-            if backup_path.exists():
-                import shutil
-                try:
-                    shutil.rmtree(backup_path)
-                    logger.debug(f"Removed old backup: {backup_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to remove old backup: {e}")
+            import shutil
+            try:
+                shutil.rmtree(backup_path)
+                logger.debug(f"Removed old backup: {backup_path}")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to remove old backup: {e}")
             
-            # Backup existing index if it exists
-            if full_index_path.exists():
-                try:
-                    full_index_path.rename(backup_path)
-                    logger.info(f"Backed up existing index to {backup_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to backup existing index: {e}")
+            # Backup existing index if it exists (rename directly, no pre-stat)
+            try:
+                os.rename(full_index_path, backup_path)
+                logger.info(f"Backed up existing index to {backup_path}")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to backup existing index: {e}")
             
             # Atomic swap: tmp -> index
             try:
-                tmp_full_index_path.rename(full_index_path)
+                os.replace(tmp_full_index_path, full_index_path)
                 logger.info(f"Index successfully swapped: {tmp_index_path} -> {index_path}")
             except Exception as e:
                 logger.error(f"Failed to swap index: {e}")
                 # Try to restore backup
-                if backup_path.exists():
-                    try:
-                        backup_path.rename(full_index_path)
-                        logger.info("Restored backup index")
-                    except Exception as restore_error:
-                        logger.error("Failed to restore backup: %s", restore_error)
+                try:
+                    os.replace(backup_path, full_index_path)
+                    logger.info("Restored backup index")
+                except FileNotFoundError:
+                    pass
+                except Exception as restore_error:
+                    logger.error("Failed to restore backup: %s", restore_error)
                 raise
             
             logger.info("Index successfully created and saved")
@@ -3,9 +3,11 @@ Answer service for generating RAG answers.
 """
 
 import asyncio
+import copy
 import hashlib
 import logging
 import os
+from dataclasses import dataclass, field
 from time import time as time_func
 from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
@@ -25,11 +27,12 @@ from app.core.prompt_config import (
     is_jinja_mode,
     build_system_prompt,
     get_selected_template_info,
+    with_mode,
 )
 from app.infra.cache import response_cache
 from app.infra.openai_utils import stream_chat_completion
 from app.services.conversation_service import ConversationService
-from app.services.prompt_service import PromptService
+from app.services.prompt_service import PromptService, now_iso
 
 # Re-export metrics for patching in tests
 from app.infra.metrics import (
@@ -42,6 +45,42 @@ from app.infra.metrics import (
 
 logger = logging.getLogger(__name__)
 
+# Static parts of the legacy-mode user message (see generate_answer_stream)
+_LEGACY_CONTEXT_PREFIX = "Documentation context (relevant fragments):\n\n"
+_LEGACY_HISTORY_PREFIX = "\n\n---\n\nConversation history:\n"
+_LEGACY_QUESTION_PREFIX = "\n\nUser question: "
+_LEGACY_INSTRUCTIONS = (
+    "\n\n"
+    "Instructions:\n"
+    "- Use ONLY the information from the context\n"
+    "- Answer as clearly and structurally as possible\n"
+    "- Provide examples and step-by-step instructions when helpful\n"
+    "- If the context is insufficient, explain what exactly is missing"
+)
+
+
+@dataclass(slots=True)
+class StreamMetrics:
+    """Context documents and stage timings reported by generate_answer_stream."""
+    context_docs: List = field(default_factory=list)
+    retrieval_ms: Optional[int] = None
+    embed_query_ms: Optional[int] = None
+    vector_search_ms: Optional[int] = None
+    format_sources_ms: Optional[int] = None
+    prompt_render_ms: Optional[int] = None
+    llm_connect_ms: Optional[int] = None
+    # Set only on strict-mode short-circuit (no relevant sources)
+    retrieved_chunks: Optional[int] = None
+
+
+@dataclass(slots=True)
+class StreamFrame:
+    """One chunk yielded by generate_answer_stream (reused between yields)."""
+    chunk: str
+    sources: List[Source]
+    not_found: bool
+    metrics: StreamMetrics
+
 
 class AnswerService:
     """Service for generating RAG answers."""
@@ -74,6 +113,12 @@ class AnswerService:
         self.chain = self.rag_chain  # alias for tests/old code
         self.vectorstore = vectorstore
         self.retriever = retriever
+        
+        # Env-driven settings read once (not on every request)
+        self._prompt_max_chars = int(os.getenv("PROMPT_MAX_CHARS", "40000"))
+        self._not_found_threshold = float(os.getenv("NOT_FOUND_SCORE_THRESHOLD", "0.20"))
+        self._reranking_enabled = os.getenv("RERANKING_ENABLED", "0").lower() in ("1", "true", "yes")
+        self._app_version = os.getenv("APP_VERSION", "")
     
     def normalize_sources(
         self,
@@ -109,13 +154,14 @@ class AnswerService:
                 context_docs = [context_docs]
         
         for idx, doc in enumerate(context_docs):
-            if not hasattr(doc, "metadata") or not doc.metadata:
+            meta = getattr(doc, "metadata", None)
+            if not meta:
                 continue
             
-            source_path = doc.metadata.get("source", "unknown")
-            section_anchor = doc.metadata.get("section_anchor")
-            section_title = doc.metadata.get("section_title")
-            filename = doc.metadata.get("filename", source_path.split("/")[-1])
+            source_path = meta.get("source", "unknown")
+            section_anchor = meta.get("section_anchor")
+            section_title = meta.get("section_title")
+            filename = meta.get("filename", source_path.split("/")[-1])
             
             # Generate stable ID
             source_id = generate_source_id(source_path, section_anchor, idx)
@@ -135,7 +181,7 @@ class AnswerService:
             snippet = " ".join(snippet.split())  # Normalize whitespace
             
             # Get score if available
-            score = doc.metadata.get("score")
+            score = meta.get("score")
             if score is not None:
                 try:
                     score = float(score)
@@ -172,7 +218,7 @@ class AnswerService:
         vectorstore=None  # Optional: for short-circuit when retriever not extractable
     ) -> Tuple[str, List[Source], bool, Dict]:
         """
-        Generate answer using RAG chain.
+        Generate answer using RAG chain (retrieve + complete).
         
         Args:
             rag_chain: RAG chain instance
@@ -189,39 +235,97 @@ class AnswerService:
         Returns:
             Tuple (answer, sources, not_found, context_docs_dict)
         """
-        # Detect language if not provided
-        if response_language is None:
-            if context_hint and context_hint.get("language"):
-                response_language = context_hint["language"]
-            else:
-                response_language = detect_response_language(
-                    question,
-                    supported=set(prompt_settings.supported_languages),
-                    fallback=prompt_settings.fallback_language
-                )
+        retrieved_docs, sources = await self.retrieve(
+            rag_chain,
+            question,
+            request_id,
+            prompt_settings,
+            top_k_override=top_k_override,
+            context_hint=context_hint,
+            vectorstore=vectorstore
+        )
         
-        # Build system prompt (use default if not provided)
-        if not system_prompt:
-            system_prompt = build_system_prompt(prompt_settings, response_language=response_language)
+        return await self.complete(
+            rag_chain,
+            question,
+            request_id,
+            prompt_settings,
+            retrieved_docs,
+            sources,
+            chat_history=chat_history,
+            response_language=response_language,
+            context_hint=context_hint,
+            system_prompt=system_prompt
+        )
+    
+    async def retrieve(
+        self,
+        rag_chain,
+        question: str,
+        request_id: str,
+        prompt_settings: PromptSettings,
+        top_k_override: Optional[int] = None,
+        context_hint: Optional[Dict] = None,
+        vectorstore=None
+    ) -> Tuple[List, List[Source]]:
+        """
+        Retrieve relevant documents and normalized sources (no LLM call).
         
-        # Retrieve and prepare sources using unified method (NO chain.invoke)
-        # This includes relevance filtering, so retrieved_docs are already filtered
-        # Build passthrough dict with endpoint for metrics
-        passthrough_dict = {}
-        if context_hint:
-            passthrough_dict.update(context_hint)
-        passthrough_dict["endpoint_name"] = "generate_answer"  # Default for generate_answer
-        
-        retrieved_docs, sources, source_content, source_namespace_dict, _ = await self._retrieve_and_prepare_sources(
+        Args:
+            rag_chain: RAG chain instance
+            question: User question
+            request_id: Request ID for logging
+            prompt_settings: Prompt settings
+            top_k_override: Override top_k (if None, uses default)
+            context_hint: Context hint dict (page_url, page_title, language)
+            vectorstore: Vectorstore instance (for short-circuit)
+            
+        Returns:
+            Tuple (retrieved_docs, sources), already filtered by relevance
+        """
+        # Retrieval only reads the endpoint name (for metrics) from passthrough
+        retrieved_docs, sources, _, _, _ = await self._retrieve_and_prepare_sources(
             rag_chain,
             question,
             request_id,
             prompt_settings,
             top_k_override,
             vectorstore,
-            passthrough=passthrough_dict
+            passthrough={"endpoint_name": "generate_answer"}
         )
+        return retrieved_docs, sources
+    
+    async def complete(
+        self,
+        rag_chain,
+        question: str,
+        request_id: str,
+        prompt_settings: PromptSettings,
+        retrieved_docs: List,
+        sources: List[Source],
+        chat_history: str = "",
+        response_language: Optional[str] = None,
+        context_hint: Optional[Dict] = None,
+        system_prompt: Optional[str] = None
+    ) -> Tuple[str, List[Source], bool, Dict]:
+        """
+        Generate answer for already retrieved documents (single LLM call).
         
+        Args:
+            rag_chain: RAG chain instance
+            question: User question
+            request_id: Request ID for logging
+            prompt_settings: Prompt settings
+            retrieved_docs: Documents returned by retrieve()
+            sources: Sources returned by retrieve()
+            chat_history: Formatted chat history text (empty string if none)
+            response_language: Response language code (auto-detected if None)
+            context_hint: Context hint dict (page_url, page_title, language)
+            system_prompt: System prompt (uses default if None)
+            
+        Returns:
+            Tuple (answer, sources, not_found, context_docs_dict)
+        """
         # Short-circuit for strict mode + no relevant sources (after filtering)
         if prompt_settings.mode == "strict" and len(retrieved_docs) == 0:
             logger.info(f"[{request_id}] Strict mode + no relevant sources after filtering: short-circuiting LLM call (chunks=0, sources=0)")
@@ -229,7 +333,22 @@ class AnswerService:
             # Return empty sources and retrieved_chunks=0
             return not_found_message, [], True, {"context_docs": [], "retrieved_chunks": 0}
         
-        # Build chain input (use retrieved_docs from _retrieve_and_prepare_sources)
+        # Detect language if not provided
+        if response_language is None:
+            if context_hint and context_hint.get("language"):
+                response_language = context_hint["language"]
+            else:
+                response_language = detect_response_language(
+                    question,
+                    supported=set(prompt_settings.supported_languages),
+                    fallback=prompt_settings.fallback_language
+                )
+        
+        # Build system prompt (use default if not provided)
+        if not system_prompt:
+            system_prompt = build_system_prompt(prompt_settings, response_language=response_language)
+        
+        # Build chain input
         # Note: sources are already normalized and filtered by relevance
         chain_input = {
             "input": question,
@@ -248,23 +367,33 @@ class AnswerService:
         # Extract answer
         answer = result.get("answer", "Failed to generate answer")
         
-        # Use sources from _retrieve_and_prepare_sources (already filtered by relevance)
+        # Use sources from retrieve() (already filtered by relevance)
         # Don't re-normalize from chain result, as it may include unfiltered docs
         context_docs = retrieved_docs
         
         # Determine not_found based on filtered sources
-        not_found_score_threshold = float(os.getenv("NOT_FOUND_SCORE_THRESHOLD", "0.20"))
-        not_found = len(sources) == 0
-        
-        if sources:
-            scores = [s.score for s in sources if s.score is not None]
-            if scores:
-                top_score = max(scores)
-                if top_score < not_found_score_threshold:
-                    not_found = True
+        not_found = self._is_not_found(sources, self._top_score(sources))
         
         return answer, sources, not_found, {"context_docs": context_docs}
     
+    @staticmethod
+    def _top_score(sources: List[Source]) -> Optional[float]:
+        """Returns the highest source score, or None if no source has a score."""
+        return max((s.score for s in sources if s.score is not None), default=None)
+    
+    def _is_not_found(self, sources: List[Source], top_score: Optional[float]) -> bool:
+        """
+        Decide whether the answer counts as not found.
+        
+        Args:
+            sources: Filtered sources
+            top_score: Result of _top_score(sources)
+            
+        Returns:
+            True if there are no sources or the best score is below NOT_FOUND_SCORE_THRESHOLD
+        """
+        return not sources or (top_score is not None and top_score < self._not_found_threshold)
+    
     def _extract_retriever_from_chain(self, rag_chain):
         """
         Extract retriever from RAG chain.
@@ -554,26 +683,23 @@ class AnswerService:
                 timing_metrics["embed_query_ms"] = None  # Not measurable separately for retriever path
                 
                 # Filter by relevance if scores are available in metadata
-                not_found_score_threshold = float(os.getenv("NOT_FOUND_SCORE_THRESHOLD", "0.20"))
+                not_found_score_threshold = self._not_found_threshold
                 filtered_docs = []
                 
                 for doc in retrieved_docs_raw:
                     # Check if doc has relevance score in metadata
-                    if hasattr(doc, 'metadata') and doc.metadata:
-                        score = doc.metadata.get('score')
-                        if score is not None:
-                            try:
-                                internal_relevance = float(score)
-                                if internal_relevance >= not_found_score_threshold:
-                                    filtered_docs.append(doc)
-                            except (ValueError, TypeError):
-                                # If score can't be converted, assume relevant
+                    meta = getattr(doc, "metadata", None)
+                    score = meta.get('score') if meta else None
+                    if score is not None:
+                        try:
+                            internal_relevance = float(score)
+                            if internal_relevance >= not_found_score_threshold:
                                 filtered_docs.append(doc)
-                        else:
-                            # No score: assume relevant (retriever may not provide scores)
+                        except (ValueError, TypeError):
+                            # If score can't be converted, assume relevant
                             filtered_docs.append(doc)
                     else:
-                        # No metadata: assume relevant
+                        # No metadata or no score: assume relevant (retriever may not provide scores)
                         filtered_docs.append(doc)
                 
                 # Apply lexical overlap gate in strict mode
@@ -589,13 +715,13 @@ class AnswerService:
                         docs_with_relevance = []
                         for doc in filtered_docs:
                             relevance = 1.0  # Default if no score
-                            if hasattr(doc, 'metadata') and doc.metadata:
-                                score = doc.metadata.get('score')
-                                if score is not None:
-                                    try:
-                                        relevance = float(score)
-                                    except (ValueError, TypeError):
-                                        pass
+                            meta = getattr(doc, "metadata", None)
+                            score = meta.get('score') if meta else None
+                            if score is not None:
+                                try:
+                                    relevance = float(score)
+                                except (ValueError, TypeError):
+                                    pass
                             docs_with_relevance.append((doc, relevance))
                         
                         docs_with_relevance = apply_lexical_gate(
@@ -681,7 +807,7 @@ class AnswerService:
                 # FAISS uses L2 distance: lower distance = more similar
                 # Convert distance to relevance [0..1]: relevance = 1 / (1 + distance)
                 # For cosine similarity: distance = 1 - cosine_sim, so relevance = cosine_sim = 1 - distance
-                not_found_score_threshold = float(os.getenv("NOT_FOUND_SCORE_THRESHOLD", "0.20"))
+                not_found_score_threshold = self._not_found_threshold
                 docs_with_relevance = []
                 
                 for doc, distance in docs_with_scores:
@@ -701,7 +827,7 @@ class AnswerService:
                     
                     if internal_relevance >= not_found_score_threshold:
                         # Store relevance in metadata for later use
-                        if not hasattr(doc, 'metadata') or doc.metadata is None:
+                        if getattr(doc, "metadata", None) is None:
                             doc.metadata = {}
                         doc.metadata['score'] = internal_relevance
                         docs_with_relevance.append((doc, internal_relevance))
@@ -789,25 +915,30 @@ class AnswerService:
         system_prompt: Optional[str] = None,
         vectorstore=None,
         stream_flush_chars: int = 50,
-        preset_override: Optional[str] = None
-    ) -> AsyncIterator[Tuple[str, List[Source], bool, Dict]]:
+        preset_override: Optional[str] = None,
+        endpoint_name: str = "stream",
+        system_namespace: Optional[Dict[str, Any]] = None,
+        passthrough: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[StreamFrame]:
         """
         Generate answer using RAG chain with real token streaming.
         
         Yields:
-            Tuples of (token_delta, sources, not_found, context_info)
-            - token_delta: Incremental token text
+            StreamFrame (the same object for every chunk of one stream; its fields are
+            only valid until the next iteration and must be treated as read-only)
+            - chunk: Incremental token text
             - sources: List of sources (available after retrieval)
             - not_found: Whether answer was not found
-            - context_info: Context documents dict
+            - metrics: StreamMetrics with context documents and stage timings
             
         Note:
+            If system_namespace (from PromptService.build_system_namespace) and/or
+            passthrough are passed, they are reused for Jinja2 rendering instead of
+            being rebuilt.
             Sources are yielded after retrieval, before LLM streaming starts.
-            Final not_found status is yielded after streaming completes.
+            Final not_found status is yielded after streaming completes, with an
+            empty chunk (every token was already yielded as a delta).
         """
-        # Start timing
-        stream_start_time = time_func()
-        
         # Detect language if not provided
         if response_language is None:
             if context_hint and context_hint.get("language"):
@@ -823,13 +954,8 @@ class AnswerService:
         if not system_prompt:
             system_prompt = build_system_prompt(prompt_settings, response_language=response_language)
         
-        # Build passthrough dict with endpoint for metrics
-        passthrough_dict = {}
-        if context_hint:
-            passthrough_dict.update(context_hint)
-        passthrough_dict["endpoint_name"] = endpoint_name  # Use provided endpoint_name
-        
         # Retrieve and prepare sources using unified method (NO chain.invoke)
+        # Retrieval only reads the endpoint name (for metrics) from passthrough
         retrieved_docs, sources, source_content, source_namespace_dict, retrieval_timing = await self._retrieve_and_prepare_sources(
             rag_chain,
             question,
@@ -837,7 +963,7 @@ class AnswerService:
             prompt_settings,
             top_k_override,
             vectorstore,
-            passthrough=passthrough_dict
+            passthrough={"endpoint_name": endpoint_name}
         )
         retrieval_ms = retrieval_timing.get("retrieval_ms", 0)
         embed_query_ms = retrieval_timing.get("embed_query_ms")
@@ -845,6 +971,7 @@ class AnswerService:
         format_sources_ms = retrieval_timing.get("format_sources_ms")
         
         context_docs = retrieved_docs
+        top_score = self._top_score(sources)
         
         # Short-circuit check: if strict mode and no relevant sources after filtering
         # Note: retrieved_docs are already filtered by relevance in _retrieve_and_prepare_sources
@@ -853,32 +980,37 @@ class AnswerService:
             not_found_message = "I don't have enough information in the documentation to answer this question."
             # Yield short-circuit message with empty sources and retrieved_chunks=0
             # This ensures sources=[] and retrieved_chunks=0 in end metrics
-            yield (not_found_message, [], True, {
-                "context_docs": [],
-                "retrieved_chunks": 0,
-                "retrieval_ms": retrieval_ms,
-                "embed_query_ms": embed_query_ms,
-                "vector_search_ms": vector_search_ms,
-                "format_sources_ms": format_sources_ms,
-                "prompt_render_ms": 0,
-                "llm_connect_ms": 0
-            })
+            yield StreamFrame(not_found_message, [], True, StreamMetrics(
+                context_docs=[],
+                retrieved_chunks=0,
+                retrieval_ms=retrieval_ms,
+                embed_query_ms=embed_query_ms,
+                vector_search_ms=vector_search_ms,
+                format_sources_ms=format_sources_ms,
+                prompt_render_ms=0,
+                llm_connect_ms=0
+            ))
             return
         
+        # Metrics are built once per stream and yielded by reference with every chunk;
+        # later stages fill in their fields in place, consumers must not mutate it
+        stream_metrics = StreamMetrics(
+            context_docs=context_docs,
+            retrieval_ms=retrieval_ms,
+            embed_query_ms=embed_query_ms,
+            vector_search_ms=vector_search_ms,
+            format_sources_ms=format_sources_ms
+        )
+        # Single frame object mutated and re-yielded for every chunk of this stream
+        frame = StreamFrame("", sources, False, stream_metrics)
+        
         # Yield sources immediately after retrieval (before LLM streaming)
         # Only yield if sources exist (filtered docs)
         if sources and len(sources) > 0:
-            yield ("", sources, False, {
-                "context_docs": context_docs,
-                "retrieval_ms": retrieval_ms,
-                "embed_query_ms": embed_query_ms,
-                "vector_search_ms": vector_search_ms,
-                "format_sources_ms": format_sources_ms
-            })
+            yield frame
         
         # Build system prompt using Jinja2 template rendering (same as /api/answer)
         from app.core.prompt_config import get_prompt_template_content, is_jinja_mode
-        from datetime import datetime
         
         # If system_prompt is None, use Jinja2 template rendering
         # If system_prompt is provided, use it (for legacy mode or when explicitly set)
@@ -886,21 +1018,23 @@ class AnswerService:
             # Use Jinja2 template rendering with source namespace (use preset_override if provided)
             template_str = get_prompt_template_content(prompt_settings, preset_override=preset_override)
             
-            # Build system namespace (minimal, conversation_id will be set by caller if needed)
-            system_namespace = {
-                "request_id": request_id,
-                "conversation_id": "",
-                "now_iso": datetime.utcnow().isoformat(),
-                "timezone": "UTC",
-                "app_version": os.getenv("APP_VERSION", ""),
-                "mode": prompt_settings.mode,
-                "output_language": response_language
-            }
+            # Reuse caller's system namespace, or build a minimal one
+            if system_namespace is None:
+                system_namespace = {
+                    "request_id": request_id,
+                    "conversation_id": "",
+                    "now_iso": now_iso(),
+                    "timezone": "UTC",
+                    "app_version": self._app_version,
+                    "mode": prompt_settings.mode,
+                    "output_language": response_language
+                }
             
-            # Build passthrough namespace
-            passthrough_dict = {}
-            if context_hint:
-                passthrough_dict.update(context_hint)
+            # Reuse caller's passthrough namespace, or build it from context hint
+            if passthrough is not None:
+                passthrough_dict = passthrough
+            else:
+                passthrough_dict = dict(context_hint) if context_hint else {}
             
             tools_namespace = {}
             
@@ -926,7 +1060,7 @@ class AnswerService:
             prompt_render_ms = int((prompt_render_end - prompt_render_start) * 1000)
             
             # Apply PROMPT_MAX_CHARS limit
-            prompt_max_chars = int(os.getenv("PROMPT_MAX_CHARS", "40000"))
+            prompt_max_chars = self._prompt_max_chars
             if len(rendered_system_prompt) > prompt_max_chars:
                 logger.warning(
                     f"[{request_id}] Prompt too long ({len(rendered_system_prompt)} chars), "
@@ -948,18 +1082,15 @@ class AnswerService:
             prompt_render_ms = 0
             # Legacy mode or explicit system_prompt: use simple template
             context_text = source_content if source_content else ""
-            human_template = (
-                "Documentation context (relevant fragments):\n\n"
-                f"{context_text}\n\n"
-                "---\n\n"
-                f"Conversation history:\n{chat_history or ''}\n\n"
-                f"User question: {question}\n\n"
-                "Instructions:\n"
-                "- Use ONLY the information from the context\n"
-                "- Answer as clearly and structurally as possible\n"
-                "- Provide examples and step-by-step instructions when helpful\n"
-                "- If the context is insufficient, explain what exactly is missing"
-            )
+            human_template = "".join((
+                _LEGACY_CONTEXT_PREFIX,
+                context_text,
+                _LEGACY_HISTORY_PREFIX,
+                chat_history or "",
+                _LEGACY_QUESTION_PREFIX,
+                question,
+                _LEGACY_INSTRUCTIONS,
+            ))
             
             # Use provided system_prompt or build default
             effective_system_prompt = system_prompt if system_prompt else build_system_prompt(prompt_settings, response_language=response_language)
@@ -981,9 +1112,12 @@ class AnswerService:
         llm_connect_start = time_func()
         llm_connect_ms = None
         
+        stream_metrics.prompt_render_ms = prompt_render_ms
+        
         # Stream tokens with flush policy: first token immediately, then buffer
-        buffer = ""
-        full_answer = ""
+        # (lists + running length instead of str +=, which is O(n^2) on long answers)
+        buffer: List[str] = []
+        buffer_len = 0
         first_token_yielded = False
         
         try:
@@ -993,80 +1127,80 @@ class AnswerService:
                     if llm_connect_ms is None:
                         llm_connect_end = time_func()
                         llm_connect_ms = int((llm_connect_end - llm_connect_start) * 1000)
-                    
-                    full_answer += token_delta
+                        stream_metrics.llm_connect_ms = llm_connect_ms
                     
                     # First token: flush immediately (no buffering)
                     if not first_token_yielded:
-                        yield (token_delta, sources, False, {
-                            "context_docs": context_docs,
-                            "retrieval_ms": retrieval_ms,
-                            "embed_query_ms": embed_query_ms,
-                            "vector_search_ms": vector_search_ms,
-                            "format_sources_ms": format_sources_ms,
-                            "prompt_render_ms": prompt_render_ms,
-                            "llm_connect_ms": llm_connect_ms
-                        })
+                        frame.chunk = token_delta
+                        yield frame
                         first_token_yielded = True
                     else:
                         # Subsequent tokens: buffer and flush when threshold reached
-                        buffer += token_delta
-                        if len(buffer) >= stream_flush_chars or stream_flush_chars == 0:
-                            yield (buffer, sources, False, {
-                                "context_docs": context_docs,
-                                "retrieval_ms": retrieval_ms,
-                                "embed_query_ms": embed_query_ms,
-                                "vector_search_ms": vector_search_ms,
-                                "format_sources_ms": format_sources_ms,
-                                "prompt_render_ms": prompt_render_ms,
-                                "llm_connect_ms": llm_connect_ms
-                            })
-                            buffer = ""
+                        buffer.append(token_delta)
+                        buffer_len += len(token_delta)
+                        if buffer_len >= stream_flush_chars:
+                            chunk = "".join(buffer)
+                            buffer.clear()
+                            buffer_len = 0
+                            frame.chunk = chunk
+                            yield frame
             
             # Flush remaining buffer
             if buffer:
-                yield (buffer, sources, False, {
-                    "context_docs": context_docs,
-                    "retrieval_ms": retrieval_ms,
-                    "embed_query_ms": embed_query_ms,
-                    "vector_search_ms": vector_search_ms,
-                    "format_sources_ms": format_sources_ms,
-                    "prompt_render_ms": prompt_render_ms,
-                    "llm_connect_ms": llm_connect_ms
-                })
+                frame.chunk = "".join(buffer)
+                yield frame
             
-            # Determine not_found
-            not_found_score_threshold = float(os.getenv("NOT_FOUND_SCORE_THRESHOLD", "0.20"))
-            not_found = len(sources) == 0
-            if sources:
-                scores = [s.score for s in sources if s.score is not None]
-                if scores:
-                    top_score = max(scores)
-                    if top_score < not_found_score_threshold:
-                        not_found = True
+            # Determine not_found (top_score computed once after retrieval)
+            not_found = self._is_not_found(sources, top_score)
             
-            # Final yield with complete answer and final status
-            yield (full_answer, sources, not_found, {
-                "context_docs": context_docs,
-                "retrieval_ms": retrieval_ms,
-                "embed_query_ms": embed_query_ms,
-                "vector_search_ms": vector_search_ms,
-                "format_sources_ms": format_sources_ms,
-                "prompt_render_ms": prompt_render_ms,
-                "llm_connect_ms": llm_connect_ms
-            })
+            # Final yield with final status only (no text: consumers treat chunk as a delta)
+            frame.chunk = ""
+            frame.not_found = not_found
+            yield frame
             
         except Exception as e:
             logger.error(f"[{request_id}] Error in streaming: {e}", exc_info=True)
-            yield (f"[Error: {str(e)}]", sources, True, {
-                "context_docs": context_docs,
-                "retrieval_ms": retrieval_ms if 'retrieval_ms' in locals() else None,
-                "embed_query_ms": embed_query_ms if 'embed_query_ms' in locals() else None,
-                "vector_search_ms": vector_search_ms if 'vector_search_ms' in locals() else None,
-                "format_sources_ms": format_sources_ms if 'format_sources_ms' in locals() else None,
-                "prompt_render_ms": prompt_render_ms if 'prompt_render_ms' in locals() else None,
-                "llm_connect_ms": llm_connect_ms if 'llm_connect_ms' in locals() else None
-            })
+            frame.chunk = f"[Error: {str(e)}]"
+            frame.not_found = True
+            yield frame
+    
+    def _store_cached_response(self, cache_key: str, response: AnswerResponse) -> None:
+        """
+        Store a cache-hit copy of response (with pre-encoded body) in response cache.
+        
+        Runs as an event loop callback, so errors are logged instead of raised.
+        
+        Args:
+            cache_key: Cache key
+            response: Freshly generated response (not modified)
+        """
+        try:
+            cached_entry = response.model_copy(
+                update={"metrics": response.metrics.model_copy(update={"cache_hit": True})}
+            )
+            cached_entry.prepare_cached_body()
+            response_cache.set(cache_key, cached_entry)
+        except Exception as e:
+            logger.warning(f"Error saving response to cache: {e}")
+    
+    async def _fetch_history(self, request: AnswerRequest, conversation_id: Optional[str]) -> str:
+        """
+        Get chat history text from request or conversation storage.
+        
+        Args:
+            request: Answer request (explicit history takes precedence)
+            conversation_id: Conversation ID to load stored history for
+            
+        Returns:
+            Formatted history text (empty string if none)
+        """
+        if request.history:
+            return parse_history_to_text(request.history)
+        if conversation_id:
+            history_list = await self.conversation_service.load_history(conversation_id, limit=20)
+            if history_list:
+                return parse_history_to_text(history_list)
+        return ""
     
     async def process_answer_request(
         self,
@@ -1125,99 +1259,91 @@ class AnswerService:
         # Update prompt_settings mode based on effective_preset
         # strict preset -> mode="strict", others -> mode="helpful"
         effective_mode = "strict" if effective_preset == "strict" else "helpful"
-        if prompt_settings.mode != effective_mode:
-            # Create new PromptSettings with updated mode
-            from app.core.prompt_config import PromptSettings
-            prompt_settings = PromptSettings(
-                supported_languages=prompt_settings.supported_languages,
-                fallback_language=prompt_settings.fallback_language,
-                base_docs_url=prompt_settings.base_docs_url,
-                not_found_message=prompt_settings.not_found_message,
-                include_sources_in_text=prompt_settings.include_sources_in_text,
-                mode=effective_mode,
-                default_temperature=prompt_settings.default_temperature,
-                default_top_k=prompt_settings.default_top_k,
-                default_max_tokens=prompt_settings.default_max_tokens
-            )
+        # Reuse cached PromptSettings with updated mode
+        prompt_settings = with_mode(prompt_settings, effective_mode)
         
         # Get or create conversation ID
         conversation_id = await self.conversation_service.get_or_create_conversation(
             request.conversation_id
         )
         
-        # Load or parse history
-        chat_history_text = ""
-        if request.history:
-            chat_history_text = parse_history_to_text(request.history)
-        elif conversation_id:
-            history_list = await self.conversation_service.load_history(conversation_id, limit=20)
-            if history_list:
-                chat_history_text = parse_history_to_text(history_list)
+        # Load or parse history in the background while namespaces are built (DB-bound)
+        history_task = asyncio.create_task(self._fetch_history(request, conversation_id))
+        try:
+            # Yield once so the task gets a chance to start before CPU-bound work
+            # (best effort: one loop turn does not guarantee its query is in flight)
+            await asyncio.sleep(0)
+            
+            # Build passthrough namespace early (needed for language selection and cache key)
+            context_hint_dict = None
+            if request.context_hint:
+                context_hint_dict = request.context_hint.model_dump()
+            
+            passthrough_dict = dict(request.passthrough) if request.passthrough else {}
+            if context_hint_dict:
+                passthrough_dict.update(context_hint_dict)
+            
+            # Select output language early (needed for cache key)
+            system_namespace_preview = self.prompt_service.build_system_namespace(
+                request_id,
+                conversation_id,
+                prompt_settings.mode,
+                passthrough=passthrough_dict,
+                context_hint=context_hint_dict,
+                accept_language_header=accept_language_header
+            )
+            output_language = system_namespace_preview["output_language"]
+            
+            # Get template info for cache key (use effective_preset for template selection)
+            template_info = get_selected_template_info()
+            template_identifier = template_info.get("selected_template", "legacy")
+            # Override template identifier if effective_preset differs from server default
+            if effective_preset != server_preset:
+                template_identifier = f"preset:{effective_preset}"
+            
+            # Build cache key with template and language
+            top_k_value = prompt_settings.default_top_k
+            if request.retrieval and request.retrieval.top_k:
+                top_k_value = request.retrieval.top_k
+            
+            detector_version = "v1"
+            reranking_enabled = self._reranking_enabled
+            
+            # Use provided index_version or default to empty
+            index_version_str = index_version or ""
+            
+            chat_history_text = await history_task
+        finally:
+            # Never leave the history task dangling if namespace/cache-key work raised
+            if not history_task.done():
+                history_task.cancel()
+            elif not history_task.cancelled():
+                history_task.exception()  # Mark any exception as retrieved
         
         # Build cache key (include history signature and effective_preset)
-        history_signature = hashlib.md5(chat_history_text.encode()).hexdigest()[:8] if chat_history_text else "no_history"
-        
-        # Build passthrough namespace early (needed for language selection and cache key)
-        context_hint_dict = None
-        if request.context_hint:
-            context_hint_dict = request.context_hint.dict()
-        
-        passthrough_dict = {}
-        if request.passthrough:
-            passthrough_dict.update(request.passthrough)
-        if context_hint_dict:
-            passthrough_dict.update(context_hint_dict)
-        
-        # Select output language early (needed for cache key)
-        system_namespace_preview = self.prompt_service.build_system_namespace(
-            request_id,
-            conversation_id,
-            prompt_settings.mode,
-            passthrough=passthrough_dict,
-            context_hint=context_hint_dict,
-            accept_language_header=accept_language_header
-        )
-        output_language = system_namespace_preview["output_language"]
-        
-        # Get template info for cache key (use effective_preset for template selection)
-        template_info = get_selected_template_info()
-        template_identifier = template_info.get("selected_template", "legacy")
-        # Override template identifier if effective_preset differs from server default
-        if effective_preset != server_preset:
-            template_identifier = f"preset:{effective_preset}"
-        
-        # Build cache key with template and language
-        top_k_value = prompt_settings.default_top_k
-        if request.retrieval and request.retrieval.top_k:
-            top_k_value = request.retrieval.top_k
-        
-        detector_version = "v1"
-        reranking_enabled = os.getenv("RERANKING_ENABLED", "0").lower() in ("1", "true", "yes")
-        
-        # Use provided index_version or default to empty
-        index_version_str = index_version or ""
+        history_signature = hashlib.blake2b(chat_history_text.encode(), digest_size=4).hexdigest() if chat_history_text else "no_history"
         
         # Build settings signature for cache key (include effective_preset to avoid cache collisions)
-        settings_signature = (
-            f"preset={effective_preset}_"
-            f"mode={prompt_settings.mode}_"
-            f"template={template_identifier}_"
-            f"lang={output_language}_"
-            f"top_k={top_k_value}_"
-            f"temp={prompt_settings.default_temperature}_"
-            f"max_tokens={getattr(prompt_settings, 'default_max_tokens', None)}_"
-            f"supported={','.join(sorted(prompt_settings.supported_languages))}_"
-            f"fallback={prompt_settings.fallback_language}_"
-            f"rerank={reranking_enabled}_"
-            f"detector={detector_version}_"
-            f"history={history_signature}_"
-            f"index_version={index_version_str}"
-        )
+        settings_signature = "_".join((
+            f"preset={effective_preset}",
+            f"mode={prompt_settings.mode}",
+            f"template={template_identifier}",
+            f"lang={output_language}",
+            f"top_k={top_k_value}",
+            f"temp={prompt_settings.default_temperature}",
+            f"max_tokens={getattr(prompt_settings, 'default_max_tokens', None)}",
+            f"supported={prompt_settings.supported_languages_key}",
+            f"fallback={prompt_settings.fallback_language}",
+            f"rerank={reranking_enabled}",
+            f"detector={detector_version}",
+            f"history={history_signature}",
+            f"index_version={index_version_str}",
+        ))
         
         cache_key = response_cache._generate_key(request.question, settings_signature)
         
         # DEBUG: Log cache key hash and components (without sensitive data)
-        cache_key_hash = hashlib.sha256(cache_key.encode()).hexdigest()[:12]
+        cache_key_hash = hashlib.blake2b(cache_key.encode(), digest_size=6).hexdigest()
         logger.debug(
             f"[{request_id}] Cache key hash={cache_key_hash}, "
             f"components=[template={template_identifier}, lang={output_language}, "
@@ -1244,15 +1370,26 @@ class AnswerService:
             logger.debug(f"[{request_id}] Cache hit for query")
             latency_ms = int((time_func() - start_time) * 1000)
             
-            # Update conversation_id in cached response (don't modify original, create copy)
-            from copy import deepcopy
-            cached_result_copy = deepcopy(cached_result)
-            cached_result_copy.conversation_id = conversation_id
-            cached_result_copy.metrics.cache_hit = True  # Ensure cache_hit flag is set
+            # Copy the cached response with this request's conversation_id. Mutable nested
+            # fields are deep-copied so callers editing the response in place can't corrupt
+            # the cache entry; immutable fields (answer, ids) are shared. Cached entries
+            # already carry metrics.cache_hit=True (see _store_cached_response), and the
+            # copied values still match the pre-encoded body, so it stays usable.
+            cached_result_copy = cached_result.model_copy(
+                update={
+                    "conversation_id": conversation_id,
+                    "metrics": cached_result.metrics.model_copy(deep=True),
+                    "sources": [source.model_copy(deep=True) for source in cached_result.sources],
+                    "usage": copy.deepcopy(cached_result.usage),
+                    "debug": copy.deepcopy(cached_result.debug),
+                }
+            )
             
-            # Save to conversation history if DB available
-            await self.conversation_service.append_message(conversation_id, "user", request.question)
-            await self.conversation_service.append_message(conversation_id, "assistant", cached_result_copy.answer)
+            # Save to conversation history if DB available (single transaction, off the response path)
+            self.conversation_service.append_messages_background(
+                conversation_id,
+                [("user", request.question), ("assistant", cached_result_copy.answer)]
+            )
             
             return cached_result_copy
         
@@ -1273,23 +1410,20 @@ class AnswerService:
         
         # For Jinja2 mode, we need context_docs to build source namespace
         if is_jinja_mode():
-            # First call to get context_docs (includes retrieval)
-            answer, sources, not_found, context_info = await self.generate_answer(
+            # Retrieve once, then render template and make a single LLM call
+            context_docs, sources = await self.retrieve(
                 rag_chain,
                 request.question,
                 request_id,
                 prompt_settings,
-                chat_history=chat_history_text,
                 top_k_override=top_k_override,
                 context_hint=context_hint_dict,
-                system_prompt="",
                 vectorstore=vectorstore
             )
             
             retrieval_end = time_func()
             
             # Build namespaces from context_docs
-            context_docs = context_info.get("context_docs", [])
             system_namespace = system_namespace_preview
             source_namespace = self.prompt_service.build_source_namespace(context_docs, prompt_settings)
             
@@ -1307,18 +1441,18 @@ class AnswerService:
             )
             prompt_render_end = time_func()
             
-            # Regenerate answer with rendered prompt (LLM call)
+            # Generate answer with rendered prompt (LLM call)
             llm_start = time_func()
-            answer, sources, not_found, _ = await self.generate_answer(
+            answer, sources, not_found, _ = await self.complete(
                 rag_chain,
                 request.question,
                 request_id,
                 prompt_settings,
+                context_docs,
+                sources,
                 chat_history=chat_history_text,
-                top_k_override=top_k_override,
                 context_hint=context_hint_dict,
-                system_prompt=rendered_system_prompt,
-                vectorstore=vectorstore
+                system_prompt=rendered_system_prompt
             )
             llm_end = time_func()
         else:
@@ -1402,13 +1536,16 @@ class AnswerService:
             debug=debug_info
         )
         
-        # Save to cache (only if no history)
+        # Save to cache (only if no history); deferred to the next event loop iteration so
+        # encoding the cached body doesn't delay returning the response
         if not chat_history_text:
-            response_cache.set(cache_key, response)
+            asyncio.get_running_loop().call_soon(self._store_cached_response, cache_key, response)
         
-        # Save to conversation history
-        await self.conversation_service.append_message(conversation_id, "user", request.question)
-        await self.conversation_service.append_message(conversation_id, "assistant", answer)
+        # Save to conversation history (single transaction, off the response path)
+        self.conversation_service.append_messages_background(
+            conversation_id,
+            [("user", request.question), ("assistant", answer)]
+        )
         
         logger.info(
             f"[{request_id}] Answer generated: conversation_id={conversation_id}, "
@@ -2,8 +2,9 @@
 Conversation service for managing conversation history.
 """
 
+import asyncio
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
@@ -11,6 +12,7 @@ from app.infra.conversations import (
     get_or_create_conversation as _get_or_create_conversation,
     load_history as _load_history,
     append_message as _append_message,
+    append_messages as _append_messages,
 )
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,10 @@ class ConversationService:
         """
         # Support both parameter names for backward compatibility
         self.db_sessionmaker = db_sessionmaker if db_sessionmaker is not None else sessionmaker
+        # Strong references to in-flight background writes (see append_messages_background)
+        self._background_tasks: Set[asyncio.Task] = set()
+        # Latest in-flight background write per conversation; load_history waits for it
+        self._pending_writes: Dict[str, asyncio.Task] = {}
     
     async def get_or_create_conversation(
         self,
@@ -60,8 +66,23 @@ class ConversationService:
         Returns:
             List of {"role": "user"|"assistant", "content": "..."} dictionaries
         """
+        # Read-your-writes: the previous turn may still be saving in the background
+        await self.wait_pending_writes(conversation_id)
         return await _load_history(self.db_sessionmaker, conversation_id, limit)
     
+    async def wait_pending_writes(self, conversation_id: str) -> None:
+        """
+        Wait until background writes scheduled for a conversation are committed.
+        
+        Args:
+            conversation_id: Conversation ID
+        """
+        pending = self._pending_writes.get(conversation_id)
+        if pending is not None:
+            # Shield: a cancelled reader must not cancel the write itself.
+            # Write errors are logged by the write and never raised here.
+            await asyncio.shield(pending)
+    
     async def append_message(
         self,
         conversation_id: str,
@@ -77,4 +98,64 @@ class ConversationService:
             content: Message content
         """
         await _append_message(self.db_sessionmaker, conversation_id, role, content)
-
+    
+    async def append_messages(
+        self,
+        conversation_id: str,
+        messages: Sequence[Tuple[str, str]]
+    ):
+        """
+        Append several messages to conversation history in one transaction.
+        
+        Args:
+            conversation_id: Conversation ID
+            messages: Sequence of (role, content) tuples, saved in order
+        """
+        await _append_messages(self.db_sessionmaker, conversation_id, messages)
+    
+    def append_messages_background(
+        self,
+        conversation_id: str,
+        messages: Sequence[Tuple[str, str]]
+    ) -> Optional[asyncio.Task]:
+        """
+        Schedule append_messages without waiting for the DB write.
+        
+        Errors are logged by the underlying write, so nothing is raised to the caller.
+        Writes for the same conversation are chained in order, and load_history
+        waits for them, so the next turn always sees this one (within this process).
+        
+        Args:
+            conversation_id: Conversation ID
+            messages: Sequence of (role, content) tuples, saved in order
+            
+        Returns:
+            Scheduled task, or None if DB is not configured
+        """
+        if not self.db_sessionmaker:
+            return None
+        
+        previous = self._pending_writes.get(conversation_id)
+        task = asyncio.create_task(self._append_after(previous, conversation_id, messages))
+        self._background_tasks.add(task)
+        self._pending_writes[conversation_id] = task
+        
+        def _on_done(done: asyncio.Task) -> None:
+            self._background_tasks.discard(done)
+            # Only clear if no newer write for this conversation replaced it
+            if self._pending_writes.get(conversation_id) is done:
+                del self._pending_writes[conversation_id]
+        
+        task.add_done_callback(_on_done)
+        return task
+    
+    async def _append_after(
+        self,
+        previous: Optional[asyncio.Task],
+        conversation_id: str,
+        messages: Sequence[Tuple[str, str]]
+    ):
+        """Run append_messages after the previous write for the conversation finished."""
+        if previous is not None:
+            await asyncio.wait((previous,))
+        await self.append_messages(conversation_id, messages)
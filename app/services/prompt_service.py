@@ -4,7 +4,8 @@ Prompt service for template rendering and namespace building.
 
 import logging
 import os
-from datetime import datetime
+import time
+from datetime import UTC, datetime
 from typing import Any, Dict, List, Optional
 
 from app.core.language_policy import select_output_language
@@ -15,6 +16,30 @@ from app.api.schemas.v2 import generate_source_id
 
 logger = logging.getLogger(__name__)
 
+# (epoch second, formatted timestamp) of the last now_iso() call
+_now_iso_cache = (0, "")
+
+
+def now_iso() -> str:
+    """
+    Current UTC time in ISO format (naive, as datetime.utcnow().isoformat()).
+    
+    The string is reused within the same wall-clock second: templates only
+    need second-level precision and this avoids formatting on every request.
+    
+    Returns:
+        ISO 8601 timestamp string
+    """
+    global _now_iso_cache
+    t = time.time()
+    second = int(t)
+    cached_second, cached_str = _now_iso_cache
+    if second == cached_second:
+        return cached_str
+    value = datetime.fromtimestamp(t, UTC).replace(tzinfo=None).isoformat()
+    _now_iso_cache = (second, value)
+    return value
+
 
 class PromptService:
     """Service for prompt template rendering and namespace building."""
@@ -30,6 +55,7 @@ class PromptService:
         self.max_chars = max_chars
         self.strict_undefined = strict_undefined
         self.renderer = PromptRenderer(max_chars=max_chars, strict_undefined=strict_undefined)
+        self._app_version = os.getenv("APP_VERSION", "")
     
     def build_system_namespace(
         self,
@@ -64,9 +90,9 @@ class PromptService:
         return {
             "request_id": request_id,
             "conversation_id": conversation_id or "",
-            "now_iso": datetime.utcnow().isoformat(),
+            "now_iso": now_iso(),
             "timezone": "UTC",
-            "app_version": os.getenv("APP_VERSION", ""),
+            "app_version": self._app_version,
             "mode": mode,
             "output_language": output_language,
             "language_reason": language_reason
@@ -17,17 +17,39 @@ Or with activated environment:
 """
 
 import argparse
+import contextlib
+import io
 import json
 import os
+import socket
 import sys
-from typing import Dict, List, Optional, Tuple
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
 
+# Allowed API keys, parsed once: ordered tuple for "first key" fallback,
+# frozenset for O(1) membership checks
+_RAG_API_KEYS_ORDERED = tuple(
+    k.strip() for k in os.getenv("RAG_API_KEYS", "").split(",") if k.strip()
+)
+_RAG_API_KEYS = frozenset(_RAG_API_KEYS_ORDERED)
+
 # Test questions (in English as required)
 QUESTIONS = [
     "What is Aqtra?",
@@ -35,44 +57,195 @@ QUESTIONS = [
     "How do buttons work?",
 ]
 
+# Interactive terminal? When output is piped or captured (CI), skip colors
+_IS_TTY = sys.stdout.isatty()
+
+# Whitespace folded to spaces in one-line answer previews
+_NL_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
 # Colors for output
-GREEN = "\033[92m"
-RED = "\033[91m"
-YELLOW = "\033[93m"
-BLUE = "\033[94m"
-RESET = "\033[0m"
+if _IS_TTY:
+    GREEN = "\033[92m"
+    RED = "\033[91m"
+    YELLOW = "\033[93m"
+    BLUE = "\033[94m"
+    RESET = "\033[0m"
+else:
+    GREEN = RED = YELLOW = BLUE = RESET = ""
+
+# Print tracebacks for request errors (set by --verbose)
+VERBOSE = False
+
+
+class LowLatencyAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that enables TCP_NODELAY and SO_KEEPALIVE on every socket.
+    
+    SSE answer deltas are tiny frames; with Nagle's algorithm and delayed ACKs
+    they can be held back for tens of milliseconds, inflating measured latency.
+    This trades a little throughput for minimum per-delta latency.
+    """
+    
+    SOCKET_OPTIONS = [
+        opt for opt in HTTPConnection.default_socket_options
+        if opt[:2] != (socket.IPPROTO_TCP, socket.TCP_NODELAY)
+    ] + [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Per-thread state: each worker gets its own Session (requests.Session is not
+# guaranteed thread-safe) and, while running a chain, its own output buffer
+_thread_state = threading.local()
+_SESSIONS: List[requests.Session] = []
+_SESSIONS_LOCK = threading.Lock()
+
+
+def new_session() -> requests.Session:
+    """
+    Build a keep-alive session.
+    
+    Every request after the first reuses the same connection instead of
+    paying a new TCP/TLS handshake.
+    """
+    session = requests.Session()
+    adapter = LowLatencyAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the calling thread's session, creating it on first use."""
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        session = new_session()
+        _thread_state.session = session
+        # Prepared templates embed this session's headers/cookies, so they are per-session
+        _thread_state.prepared = {}
+        with _SESSIONS_LOCK:
+            _SESSIONS.append(session)
+    return session
+
+
+def close_sessions() -> None:
+    """Close every session created by get_session()."""
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS:
+            session.close()
+        _SESSIONS.clear()
+
+# Static per-endpoint headers (request-specific ones are merged on top)
+HEADERS_JSON = {"Content-Type": "application/json", "Accept": "application/json"}
+HEADERS_SSE = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+
+
+def encode_json(obj) -> bytes:
+    """Encode a request body to JSON bytes (orjson when installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(response: requests.Response):
+    """Decode a JSON response body straight from bytes (orjson when installed)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+def _pretty(obj) -> str:
+    """
+    Format JSON for diagnostics (orjson when installed).
+    
+    Indented on a terminal; a single compact line when output is piped or
+    captured, so CI logs keep one record per line.
+    """
+    if not _IS_TTY:
+        return encode_json(obj).decode("utf-8")
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2)
+
+
+# Prepared request templates are cached per session (see get_session), keyed
+# by (url, headers); URL parsing, header merging and cookie wiring are done
+# once per endpoint instead of per turn
+def post_prepared(url: str, body: bytes, headers: Dict[str, str], **send_kwargs) -> requests.Response:
+    """
+    POST a pre-encoded body using a cached prepared request template.
+    
+    Args:
+        url: Full endpoint URL
+        body: Encoded JSON body
+        headers: Request headers (merged with session headers once)
+        **send_kwargs: Passed to Session.send (timeout, stream)
+    
+    Returns:
+        Response object
+    """
+    session = get_session()
+    cache: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], requests.PreparedRequest] = _thread_state.prepared
+    key = (url, tuple(sorted(headers.items())))
+    template = cache.get(key)
+    if template is None:
+        template = session.prepare_request(requests.Request("POST", url, headers=headers))
+        cache[key] = template
+    
+    prepared = template.copy()
+    prepared.body = body
+    prepared.headers["Content-Length"] = str(len(body))
+    # Session.send skips what Session.request does here: proxies, CA bundle
+    # (REQUESTS_CA_BUNDLE), verify/cert from the environment
+    settings = session.merge_environment_settings(url, {}, send_kwargs.get("stream"), None, None)
+    settings.update(send_kwargs)
+    return session.send(prepared, **settings)
+
+
+def _out():
+    """Output stream for the current thread (chain buffer or stdout)."""
+    return getattr(_thread_state, "out", None) or sys.stdout
 
 
 def print_header(text: str):
     """Print a formatted header."""
-    print(f"\n{BLUE}{'=' * 60}{RESET}")
-    print(f"{BLUE}{text}{RESET}")
-    print(f"{BLUE}{'=' * 60}{RESET}\n")
+    print(f"\n{BLUE}{'=' * 60}{RESET}", file=_out())
+    print(f"{BLUE}{text}{RESET}", file=_out())
+    print(f"{BLUE}{'=' * 60}{RESET}\n", file=_out())
 
 
 def print_pass(text: str):
     """Print a PASS message."""
-    print(f"{GREEN}✓ PASS: {text}{RESET}")
+    print(f"{GREEN}✓ PASS: {text}{RESET}", file=_out())
 
 
 def print_fail(text: str):
     """Print a FAIL message."""
-    print(f"{RED}✗ FAIL: {text}{RESET}")
+    print(f"{RED}✗ FAIL: {text}{RESET}", file=_out())
 
 
 def print_warn(text: str):
     """Print a WARNING message."""
-    print(f"{YELLOW}⚠ WARN: {text}{RESET}")
+    print(f"{YELLOW}⚠ WARN: {text}{RESET}", file=_out())
 
 
 def print_skip(text: str):
     """Print a SKIP message."""
-    print(f"{YELLOW}⊘ SKIP: {text}{RESET}")
+    print(f"{YELLOW}⊘ SKIP: {text}{RESET}", file=_out())
 
 
 def print_info(text: str):
     """Print an INFO message."""
-    print(f"{text}")
+    print(f"{text}", file=_out())
 
 
 def check_health(base_url: str) -> bool:
@@ -80,11 +253,11 @@ def check_health(base_url: str) -> bool:
     print_header("Part 0: Environment Check")
     
     try:
-        response = requests.get(f"{base_url}/health", timeout=5)
+        response = get_session().get(f"{base_url}/health", timeout=5)
         response.raise_for_status()
-        data = response.json()
+        data = decode_json(response)
         
-        print_info(f"Health check: {json.dumps(data, indent=2)}")
+        print_info(f"Health check: {_pretty(data)}")
         
         if data.get("status") == "ok":
             print_pass("Health check passed")
@@ -108,6 +281,19 @@ def check_health(base_url: str) -> bool:
         return False
 
 
+def warm_connection(base_url: str) -> None:
+    """
+    Re-touch the pooled keep-alive connection right before measured requests.
+    
+    /api/answer and /stream share the same host pool, so one cheap GET moves
+    any reconnect cost (e.g. after the server closed an idle socket) out of
+    Q1's measurement window for both endpoints.
+    """
+    # Warm-up is best effort; the real requests report their own errors
+    with contextlib.suppress(requests.RequestException):
+        get_session().get(f"{base_url}/health", timeout=2).close()
+
+
 def check_auth_mode(api_key: str) -> Tuple[bool, str]:
     """
     Check authentication mode and determine which API key to use.
@@ -115,22 +301,19 @@ def check_auth_mode(api_key: str) -> Tuple[bool, str]:
     Returns:
         (is_open_mode, api_key_to_use)
     """
-    rag_api_keys = os.getenv("RAG_API_KEYS", "")
-    
-    if not rag_api_keys:
+    if not _RAG_API_KEYS:
         print_info("RAG_API_KEYS not set - using open mode")
         print_info(f"Using provided api_key: '{api_key}' (any non-empty value works)")
         return True, api_key
     else:
-        allowed_keys = [k.strip() for k in rag_api_keys.split(",") if k.strip()]
-        print_info(f"RAG_API_KEYS is set with {len(allowed_keys)} key(s)")
+        print_info(f"RAG_API_KEYS is set with {len(_RAG_API_KEYS_ORDERED)} key(s)")
         
         # Use provided key if it's in the list, otherwise use first key
-        if api_key in allowed_keys:
+        if api_key in _RAG_API_KEYS:
             print_info(f"Using provided api_key: '{api_key}'")
             return False, api_key
         else:
-            first_key = allowed_keys[0]
+            first_key = _RAG_API_KEYS_ORDERED[0]
             print_warn(f"Provided api_key '{api_key}' not in RAG_API_KEYS")
             print_info(f"Using first key from RAG_API_KEYS: '{first_key}'")
             return False, first_key
@@ -163,13 +346,10 @@ def test_answer_endpoint(
         print_info(f"  Using conversation_id: {conversation_id}")
     
     try:
-        response = requests.post(
+        response = post_prepared(
             f"{base_url}/api/answer",
-            json=payload,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            },
+            encode_json(payload),
+            HEADERS_JSON,
             timeout=60
         )
         
@@ -177,13 +357,13 @@ def test_answer_endpoint(
         if response.status_code != 200:
             print_fail(f"HTTP {response.status_code}")
             try:
-                error_data = response.json()
-                print_info(f"  Error: {json.dumps(error_data, indent=2)}")
+                error_data = decode_json(response)
+                print_info(f"  Error: {_pretty(error_data)}")
             except (ValueError, json.JSONDecodeError):
                 print_info(f"  Response: {response.text[:500]}")
             return False, None, None
         
-        data = response.json()
+        data = decode_json(response)
         
         # Validate response structure
         required_fields = ["answer", "sources", "conversation_id", "request_id"]
@@ -204,7 +384,7 @@ def test_answer_endpoint(
         if answer:
             print_pass(f"Answer received ({len(answer)} chars)")
             # Print first 200 chars
-            preview = answer[:200].replace("\n", " ")
+            preview = answer[:200].translate(_NL_TABLE)
             print_info(f"  Preview: {preview}...")
         else:
             print_fail("Empty answer")
@@ -256,34 +436,45 @@ def test_answer_endpoint(
     except requests.exceptions.Timeout:
         print_fail("Request timeout")
         return False, None, None
-    except Exception as e:
+    except (requests.RequestException, ValueError) as e:
         print_fail(f"Error: {e}")
-        import traceback
-        print_info(f"  Traceback: {traceback.format_exc()}")
+        if VERBOSE:
+            traceback.print_exc()
+        return False, None, None
+    except Exception as e:
+        # Malformed payloads (AttributeError/KeyError/TypeError) fail this check
+        # instead of escaping the worker thread and aborting the whole run
+        print_fail(f"Unexpected error: {type(e).__name__}: {e}")
+        if VERBOSE:
+            traceback.print_exc()
         return False, None, None
 
 
-def parse_sse_event(line: str) -> Optional[Dict]:
-    """Parse SSE event line (robust parser)."""
-    # Handle lines that may or may not have "data: " prefix
+def parse_sse_event(line: bytes) -> Optional[Dict]:
+    """
+    Parse a raw SSE line (robust parser).
+    
+    Works on bytes so callers never decode non-``data:`` lines; the JSON
+    payload is handed to orjson (or json) without an intermediate str.
+    """
     line = line.strip()
-    if not line:
-        return None
     
     # Remove "data: " prefix if present
-    if line.startswith("data: "):
-        json_str = line[6:].strip()
-    elif line.startswith("data:"):
-        json_str = line[5:].strip()
+    if line.startswith(b"data: "):
+        payload = line[6:]
+    elif line.startswith(b"data:"):
+        payload = line[5:]
     else:
         return None
     
-    if not json_str:
+    if not payload:
         return None
     
     try:
-        return json.loads(json_str)
-    except json.JSONDecodeError:
+        if ORJSON_AVAILABLE:
+            return orjson.loads(payload)
+        return json.loads(payload)
+    except ValueError:
         return None
 
 
@@ -291,61 +482,119 @@ def parse_sse_stream(response) -> List[Dict]:
     """
     Parse SSE stream robustly, handling buffering issues.
     
+    Reads the body in large chunks and splits lines at the bytes level, so
+    only ``data:`` frames are decoded and partial lines simply stay in the
+    buffer until the rest of the frame arrives.
+    
     Returns:
         List of parsed events
     """
     events = []
-    buffer = ""
+    buf = bytearray()
     
-    for line_bytes in response.iter_lines():
-        if not line_bytes:
-            continue
-        
-        try:
-            line = line_bytes.decode('utf-8')
-        except UnicodeDecodeError:
+    for chunk in response.iter_content(chunk_size=16384):
+        if not chunk:
             continue
+        buf += chunk
         
-        # Handle partial lines (buffering)
-        if line.endswith('\n') or line.endswith('\r'):
-            line = line.rstrip()
-        
-        # Accumulate buffer if line doesn't start with "data:"
-        if not line.startswith("data:") and not line.startswith("data: "):
-            if buffer:
-                # Try to parse accumulated buffer
-                event = parse_sse_event(buffer)
-                if event:
-                    events.append(event)
-                buffer = ""
-            continue
-        
-        # If we have accumulated buffer, try to parse it first
-        if buffer:
-            event = parse_sse_event(buffer)
-            if event:
-                events.append(event)
-            buffer = ""
-        
-        # Check if line is complete
-        if line.startswith("data: ") or line.startswith("data:"):
+        while (i := buf.find(b"\n")) >= 0:
+            line = bytes(buf[:i])
+            del buf[:i + 1]
             event = parse_sse_event(line)
             if event:
                 events.append(event)
-            else:
-                buffer = line
-        else:
-            buffer += line
     
-    # Parse remaining buffer
-    if buffer:
-        event = parse_sse_event(buffer)
+    # Parse remaining buffer (stream ended without trailing newline)
+    if buf:
+        event = parse_sse_event(bytes(buf))
         if event:
             events.append(event)
     
     return events
 
 
+@dataclass
+class StreamState:
+    """Mutable state accumulated while consuming one /stream response."""
+    
+    answer_buf: io.StringIO = field(default_factory=io.StringIO)
+    answer_events: int = 0
+    sources_count: int = 0
+    conv_id: Optional[str] = None
+    request_id: Optional[str] = None
+    error: bool = False
+
+
+def _h_id(event: Dict, state: StreamState) -> None:
+    state.conv_id = event.get("conversation_id")
+    state.request_id = event.get("request_id")
+    print_pass(f"ID event: conversation_id={state.conv_id}, request_id={state.request_id}")
+
+
+def _h_answer(event: Dict, state: StreamState) -> None:
+    # Hot path: one call per streamed delta, keep it minimal
+    delta = event.get("delta")
+    if delta:
+        # Empty/null deltas are neither written nor counted (as before StringIO)
+        state.answer_buf.write(delta)
+        state.answer_events += 1
+
+
+def _h_source(event: Dict, state: StreamState) -> None:
+    state.sources_count += 1
+    source = event.get("source", {})
+    title = source.get("title", "unknown")
+    print_info(f"  Source: {title}")
+
+
+# (metrics key, label) pairs shown in the end-event breakdown, in display order
+_BREAKDOWN_FIELDS = (
+    ("embed_query_ms", "embed_query"),
+    ("vector_search_ms", "vector_search"),
+    ("format_sources_ms", "format_sources"),
+    ("retrieval_ms", "retrieval_total"),
+    ("prompt_render_ms", "prompt_render"),
+    ("llm_connect_ms", "llm_connect"),
+)
+
+
+def _h_end(event: Dict, state: StreamState) -> None:
+    metrics = event.get("metrics", {})
+    if not metrics:
+        return
+    latency = metrics.get("latency_ms", 0)
+    cache_hit = metrics.get("cache_hit", False)
+    breakdown_parts = [
+        f"{label}={metrics[key]}ms"
+        for key, label in _BREAKDOWN_FIELDS
+        if metrics.get(key) is not None
+    ]
+    print_info(f"  End event: latency={latency}ms, cache_hit={cache_hit}")
+    if breakdown_parts:
+        print_info(f"  Breakdown: {', '.join(breakdown_parts)}")
+
+
+def _h_error(event: Dict, state: StreamState) -> None:
+    error = event.get("error", {})
+    code = error.get("code", "unknown")
+    message = error.get("message", "unknown")
+    print_fail(f"Error event: {code} - {message}")
+    state.error = True
+
+
+# Event types whose relative order is validated: id -> answer... -> end
+_ORDERED_EVENT_TYPES = frozenset(("id", "answer", "end"))
+
+# SSE event type -> handler; one dict lookup per frame instead of an if/elif chain
+STREAM_HANDLERS: Dict[str, Callable[[Dict, StreamState], None]] = {
+    "id": _h_id,
+    "answer": _h_answer,
+    "source": _h_source,
+    "end": _h_end,
+    "error": _h_error,
+}
+
+
 def test_stream_endpoint(
     base_url: str,
     api_key: str,
@@ -376,18 +625,15 @@ def test_stream_endpoint(
     events = []
     conv_id = None
     
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "text/event-stream"
-    }
+    headers = HEADERS_SSE
     if accept_language:
-        headers["Accept-Language"] = accept_language
+        headers = {**HEADERS_SSE, "Accept-Language": accept_language}
     
     try:
-        response = requests.post(
+        response = post_prepared(
             f"{base_url}/stream",
-            json=payload,
-            headers=headers,
+            encode_json(payload),
+            headers,
             stream=True,
             timeout=timeout
         )
@@ -399,11 +645,11 @@ def test_stream_endpoint(
                 # Try to read error from stream
                 for line in response.iter_lines():
                     if line:
-                        event = parse_sse_event(line.decode('utf-8'))
+                        event = parse_sse_event(line)
                         if event and event.get("type") == "error":
-                            print_info(f"  Error event: {json.dumps(event, indent=2)}")
+                            print_info(f"  Error event: {_pretty(event)}")
                             break
-            except (UnicodeDecodeError, ValueError):
+            except ValueError:
                 pass
             return False, None, []
         
@@ -411,93 +657,47 @@ def test_stream_endpoint(
         events = parse_sse_stream(response)
         
         # Process events
-        event_types = []
-        answer_deltas = []
-        sources_count = 0
+        state = StreamState()
+        first_tracked = None
+        last_tracked = None
         
         for event in events:
             if not event:
                 continue
             
             event_type = event.get("type")
-            event_types.append(event_type)
-            
-            if event_type == "id":
-                conv_id = event.get("conversation_id")
-                request_id = event.get("request_id")
-                print_pass(f"ID event: conversation_id={conv_id}, request_id={request_id}")
-            
-            elif event_type == "answer":
-                delta = event.get("delta", "")
-                if delta:
-                    answer_deltas.append(delta)
-            
-            elif event_type == "source":
-                sources_count += 1
-                source = event.get("source", {})
-                title = source.get("title", "unknown")
-                print_info(f"  Source: {title}")
+            if event_type in _ORDERED_EVENT_TYPES:
+                if first_tracked is None:
+                    first_tracked = event_type
+                last_tracked = event_type
             
-            elif event_type == "end":
-                metrics = event.get("metrics", {})
-                if metrics:
-                    latency = metrics.get("latency_ms", 0)
-                    cache_hit = metrics.get("cache_hit", False)
-                    retrieval_ms = metrics.get("retrieval_ms")
-                    embed_query_ms = metrics.get("embed_query_ms")
-                    vector_search_ms = metrics.get("vector_search_ms")
-                    format_sources_ms = metrics.get("format_sources_ms")
-                    prompt_render_ms = metrics.get("prompt_render_ms")
-                    llm_connect_ms = metrics.get("llm_connect_ms")
-                    
-                    breakdown_parts = []
-                    if embed_query_ms is not None:
-                        breakdown_parts.append(f"embed_query={embed_query_ms}ms")
-                    if vector_search_ms is not None:
-                        breakdown_parts.append(f"vector_search={vector_search_ms}ms")
-                    if format_sources_ms is not None:
-                        breakdown_parts.append(f"format_sources={format_sources_ms}ms")
-                    if retrieval_ms is not None:
-                        breakdown_parts.append(f"retrieval_total={retrieval_ms}ms")
-                    if prompt_render_ms is not None:
-                        breakdown_parts.append(f"prompt_render={prompt_render_ms}ms")
-                    if llm_connect_ms is not None:
-                        breakdown_parts.append(f"llm_connect={llm_connect_ms}ms")
-                    
-                    breakdown_str = ", ".join(breakdown_parts) if breakdown_parts else "no breakdown"
-                    print_info(f"  End event: latency={latency}ms, cache_hit={cache_hit}")
-                    if breakdown_parts:
-                        print_info(f"  Breakdown: {breakdown_str}")
-            
-            elif event_type == "error":
-                error = event.get("error", {})
-                code = error.get("code", "unknown")
-                message = error.get("message", "unknown")
-                print_fail(f"Error event: {code} - {message}")
-                return False, conv_id, events
+            handler = STREAM_HANDLERS.get(event_type)
+            if handler:
+                handler(event, state)
+            if state.error:
+                return False, state.conv_id, events
         
-        # Validate event order
-        expected_order = ["id", "answer", "end"]
-        # Allow sources between answer and end
-        filtered_types = [t for t in event_types if t in expected_order]
+        conv_id = state.conv_id
+        sources_count = state.sources_count
         
-        if filtered_types[0] != "id":
+        # Validate event order (sources may appear between answer and end)
+        if first_tracked != "id":
             print_fail("First event should be 'id'")
             return False, conv_id, events
         
-        if filtered_types[-1] != "end":
+        if last_tracked != "end":
             print_fail("Last event should be 'end'")
             return False, conv_id, events
         
         # Check answer
-        full_answer = "".join(answer_deltas)
+        full_answer = state.answer_buf.getvalue()
         if full_answer:
             print_pass(f"Answer received via SSE ({len(full_answer)} chars)")
-            preview = full_answer[:200].replace("\n", " ")
+            preview = full_answer[:200].translate(_NL_TABLE)
             print_info(f"  Preview: {preview}...")
             
             # Check for multiple answer events (real streaming)
-            answer_event_count = sum(1 for t in event_types if t == "answer")
+            answer_event_count = state.answer_events
             if answer_event_count > 1:
                 print_pass(f"Real streaming detected: {answer_event_count} answer events")
             else:
@@ -562,10 +762,17 @@ def test_stream_endpoint(
     except requests.exceptions.Timeout:
         print_fail("Request timeout")
         return False, None, []
-    except Exception as e:
+    except (requests.RequestException, ValueError) as e:
         print_fail(f"Error: {e}")
-        import traceback
-        print_info(f"  Traceback: {traceback.format_exc()}")
+        if VERBOSE:
+            traceback.print_exc()
+        return False, None, []
+    except Exception as e:
+        # Malformed payloads (AttributeError/KeyError/TypeError) fail this check
+        # instead of escaping the worker thread and aborting the whole run
+        print_fail(f"Unexpected error: {type(e).__name__}: {e}")
+        if VERBOSE:
+            traceback.print_exc()
         return False, None, []
 
 
@@ -582,7 +789,7 @@ def test_history_as_string(base_url: str, api_key: str, timeout: int = 60) -> bo
     }
     
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{base_url}/api/answer",
             json=payload,
             headers={
@@ -593,15 +800,15 @@ def test_history_as_string(base_url: str, api_key: str, timeout: int = 60) -> bo
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = decode_json(response)
             print_pass("History as JSON string accepted")
             print_info(f"  Answer length: {len(data.get('answer', ''))}")
             return True
         else:
             print_fail(f"HTTP {response.status_code}")
             try:
-                error_data = response.json()
-                print_info(f"  Error: {json.dumps(error_data, indent=2)}")
+                error_data = decode_json(response)
+                print_info(f"  Error: {_pretty(error_data)}")
             except (ValueError, json.JSONDecodeError):
                 print_info(f"  Response: {response.text[:500]}")
             return False
@@ -660,7 +867,7 @@ def test_accept_language(
     }
     
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{base_url}/api/prompt/render",
             json=payload,
             headers={
@@ -675,7 +882,7 @@ def test_accept_language(
             print_fail(f"HTTP {response.status_code} from /api/prompt/render")
             return False, None
         
-        data = response.json()
+        data = decode_json(response)
         output_language = data.get("output_language", "").lower()
         language_reason = data.get("language_reason", "")
         
@@ -770,7 +977,7 @@ def test_strict_miss_short_circuit(
         if accept_language:
             headers["Accept-Language"] = accept_language
         
-        response = requests.post(
+        response = get_session().post(
             f"{base_url}/api/answer",
             json=payload,
             headers=headers,
@@ -778,7 +985,7 @@ def test_strict_miss_short_circuit(
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = decode_json(response)
             not_found = data.get("not_found", False)
             sources = data.get("sources", [])
             answer = data.get("answer", "").lower()
@@ -839,7 +1046,7 @@ def test_strict_miss_short_circuit(
         if accept_language:
             headers["Accept-Language"] = accept_language
         
-        response = requests.post(
+        response = get_session().post(
             f"{base_url}/stream",
             json=payload,
             headers=headers,
@@ -937,9 +1144,17 @@ def main():
         action="store_true",
         help="Skip history as string test"
     )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print tracebacks for request errors"
+    )
     
     args = parser.parse_args()
     
+    global VERBOSE
+    VERBOSE = args.verbose
+    
     # Set expect_cache_hit based on run_twice if not explicitly set
     if args.run_twice and not hasattr(args, '_expect_cache_hit_set'):
         args.expect_cache_hit_on_second_run = True
@@ -953,26 +1168,23 @@ def main():
         print_info("Run twice: enabled (testing cache hits)")
     print_info(f"Timeout: {args.timeout_seconds}s")
     
-    # Part 0: Environment check
-    if not check_health(args.base_url):
-        print_fail("Health check failed, aborting tests")
-        return 1
+    try:
+        return run_smoke(args)
+    finally:
+        close_sessions()
+
+
+def run_answer_chain(args: argparse.Namespace, api_key: str) -> Dict[str, Any]:
+    """
+    Run the /api/answer conversation plus the history and Accept-Language checks.
     
-    is_open_mode, api_key_to_use = check_auth_mode(args.api_key)
+    Returns:
+        Partial results dict (answer, history, accept_language)
+    """
+    chain_results: Dict[str, Any] = {"answer": [], "history": None, "accept_language": None}
     
-    # Check cache settings
-    cache_ttl = int(os.getenv("CACHE_TTL_SECONDS", "600"))
-    cache_enabled = cache_ttl > 0
-    
-    # Results tracking
-    results = {
-        "answer": [],
-        "stream": [],
-        "history": None,
-        "accept_language": None,
-        "cache_warmup": None,
-        "strict_miss": None
-    }
+    # Keep-alive warm-up so Q1 latency reflects steady-state request cost
+    warm_connection(args.base_url)
     
     # Part 1: Test /api/answer
     print_header("Part 1: Testing /api/answer endpoint")
@@ -981,7 +1193,7 @@ def main():
     for i, question in enumerate(QUESTIONS, 1):
         success, data, conv_id = test_answer_endpoint(
             args.base_url,
-            api_key_to_use,
+            api_key,
             question,
             conversation_id,
             question_num=i,
@@ -989,7 +1201,7 @@ def main():
             timeout=args.timeout_seconds
         )
         
-        results["answer"].append((f"Q{i}", success))
+        chain_results["answer"].append((f"Q{i}", success))
         
         if success and conv_id:
             conversation_id = conv_id
@@ -998,18 +1210,33 @@ def main():
     
     # Part 1D: Test history as string
     if not args.skip_history_test:
-        history_success = test_history_as_string(args.base_url, api_key_to_use, args.timeout_seconds)
-        results["history"] = history_success
+        history_success = test_history_as_string(args.base_url, api_key, args.timeout_seconds)
+        chain_results["history"] = history_success
     
     # Part 1E: Test Accept-Language
     if args.accept_language:
         accept_lang_success, detected_lang = test_accept_language(
             args.base_url,
-            api_key_to_use,
+            api_key,
             args.accept_language,
             args.timeout_seconds
         )
-        results["accept_language"] = accept_lang_success
+        chain_results["accept_language"] = accept_lang_success
+    
+    return chain_results
+
+
+def run_stream_chain(args: argparse.Namespace, api_key: str) -> Dict[str, Any]:
+    """
+    Run the /stream conversation.
+    
+    Returns:
+        Partial results dict (stream)
+    """
+    chain_results: Dict[str, Any] = {"stream": []}
+    
+    # Keep-alive warm-up so Q1 latency reflects steady-state request cost
+    warm_connection(args.base_url)
     
     # Part 2: Test /stream
     print_header("Part 2: Testing /stream endpoint (SSE)")
@@ -1018,7 +1245,7 @@ def main():
     for i, question in enumerate(QUESTIONS, 1):
         success, conv_id, events = test_stream_endpoint(
             args.base_url,
-            api_key_to_use,
+            api_key,
             question,
             stream_conv_id,
             question_num=i,
@@ -1027,13 +1254,61 @@ def main():
             run_number=1  # First run is cold
         )
         
-        results["stream"].append((f"Q{i}", success))
+        chain_results["stream"].append((f"Q{i}", success))
         
         if success and conv_id:
             stream_conv_id = conv_id
         elif not success:
             print_warn("Continuing with next question despite failure...")
     
+    return chain_results
+
+
+def _run_buffered(fn: Callable[..., Dict[str, Any]], *args) -> Tuple[str, Dict[str, Any]]:
+    """Run a chain with its output captured, so concurrent chains don't interleave."""
+    buf = io.StringIO()
+    _thread_state.out = buf
+    try:
+        chain_results = fn(*args)
+    finally:
+        _thread_state.out = None
+    return buf.getvalue(), chain_results
+
+
+def run_smoke(args: argparse.Namespace) -> int:
+    """Run all smoke test parts and print the summary."""
+    # Part 0: Environment check
+    if not check_health(args.base_url):
+        print_fail("Health check failed, aborting tests")
+        return 1
+    
+    is_open_mode, api_key_to_use = check_auth_mode(args.api_key)
+    
+    # Check cache settings
+    cache_ttl = int(os.getenv("CACHE_TTL_SECONDS", "600"))
+    cache_enabled = cache_ttl > 0
+    
+    # Results tracking
+    results = {
+        "answer": [],
+        "stream": [],
+        "history": None,
+        "accept_language": None,
+        "cache_warmup": None,
+        "strict_miss": None
+    }
+    
+    # Parts 1 and 2: the answer and stream conversations are independent,
+    # so run them concurrently (each thread has its own session) and print
+    # their buffered output in order
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        answer_future = executor.submit(_run_buffered, run_answer_chain, args, api_key_to_use)
+        stream_future = executor.submit(_run_buffered, run_stream_chain, args, api_key_to_use)
+        for future in (answer_future, stream_future):
+            output, chain_results = future.result()
+            sys.stdout.write(output)
+            results.update(chain_results)
+    
     # Part 2B: Cache warmup test
     if args.run_twice:
         print_header("Part 2B: Testing cache warmup (double run)")
@@ -1062,7 +1337,7 @@ def main():
             
             try:
                 # First request
-                probe_response1 = requests.post(
+                probe_response1 = get_session().post(
                     f"{args.base_url}/api/answer",
                     json=probe_payload,
                     headers=probe_headers,
@@ -1070,13 +1345,13 @@ def main():
                 )
                 
                 if probe_response1.status_code == 200:
-                    probe_data1 = probe_response1.json()
+                    probe_data1 = decode_json(probe_response1)
                     probe_metrics1 = probe_data1.get("metrics", {})
                     probe_cache_hit1 = probe_metrics1.get("cache_hit", False)
                     print_info(f"  Q1 (first): cache_hit={probe_cache_hit1}")
                     
                     # Second request (identical payload)
-                    probe_response2 = requests.post(
+                    probe_response2 = get_session().post(
                         f"{args.base_url}/api/answer",
                         json=probe_payload,
                         headers=probe_headers,
@@ -1084,7 +1359,7 @@ def main():
                     )
                     
                     if probe_response2.status_code == 200:
-                        probe_data2 = probe_response2.json()
+                        probe_data2 = decode_json(probe_response2)
                         probe_metrics2 = probe_data2.get("metrics", {})
                         probe_cache_hit2 = probe_metrics2.get("cache_hit", False)
                         print_info(f"  Q1 (second): cache_hit={probe_cache_hit2}")
@@ -23,8 +23,6 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from dotenv import load_dotenv
-from app.rag.indexing import build_or_load_vectorstore, load_mkdocs_documents
-from app.settings import Settings
 
 # Configure logging
 logging.basicConfig(
@@ -53,6 +51,9 @@ def main():
     )
     args = parser.parse_args()
     
+    # Deferred: app imports are only paid once arguments are valid (--help exits above)
+    from app.settings import Settings
+    
     # Get settings
     settings = Settings()
     
@@ -66,6 +67,9 @@ def main():
     logger.info(f"Docs path: {docs_path}")
     logger.info(f"Vectorstore dir: {vectorstore_dir}")
     
+    # Deferred: pulls in langchain/FAISS/embeddings, which take seconds to import
+    from app.rag.indexing import build_or_load_vectorstore, load_mkdocs_documents
+    
     try:
         # Load documents
         logger.info(f"Loading documents from {docs_path}...")
@@ -0,0 +1,82 @@
+"""
+Tests for AnswerResponse pre-encoded body and answer_response_json splicing.
+"""
+
+import json
+
+import pytest
+
+from app.api.schemas.v2 import AnswerResponse, MetricsPayload, Source, answer_response_json
+
+pytestmark = pytest.mark.offline
+
+
+def _make_response(conversation_id: str = "c_original") -> AnswerResponse:
+    return AnswerResponse(
+        answer="The Button component is used to trigger actions.",
+        sources=[
+            Source(
+                id="abc123",
+                title="Button Component",
+                url="https://docs.aqtra.io/app-development/ui-components/button.html",
+                snippet="Buttons trigger actions \"quoted\" and unicode: ü",
+                score=0.87,
+                meta={"section": "UI"},
+            )
+        ],
+        conversation_id=conversation_id,
+        request_id="req_xyz789",
+        not_found=False,
+        metrics=MetricsPayload(latency_ms=1234, cache_hit=True, retrieved_chunks=1),
+        retrieved_chunks=1,
+        debug={"top_score": 0.87},
+    )
+
+
+def _cached(response: AnswerResponse) -> AnswerResponse:
+    response.prepare_cached_body()
+    return response
+
+
+def test_without_cached_body_uses_full_serialization():
+    response = _make_response()
+
+    assert response.cached_body() is None
+    assert answer_response_json(response) == response.model_dump_json().encode()
+
+
+def test_spliced_body_matches_full_serialization():
+    response = _cached(_make_response())
+
+    assert response.cached_body() is not None
+    assert json.loads(answer_response_json(response)) == json.loads(response.model_dump_json())
+
+
+def test_copy_with_new_conversation_id_reuses_body():
+    cached = _cached(_make_response())
+    hit = cached.model_copy(update={"conversation_id": 'c_"new"'})
+
+    assert hit.cached_body() is not None
+    data = json.loads(answer_response_json(hit))
+    assert data == json.loads(hit.model_dump_json())
+    assert data["conversation_id"] == 'c_"new"'
+
+
+def test_copy_updating_other_field_invalidates_body():
+    cached = _cached(_make_response())
+    hit = cached.model_copy(update={"answer": "Different answer"})
+
+    assert hit.cached_body() is None
+    assert json.loads(answer_response_json(hit))["answer"] == "Different answer"
+
+
+def test_nested_in_place_change_invalidates_body():
+    cached = _cached(_make_response())
+    hit = cached.model_copy(update={"conversation_id": "c_new"})
+    hit.metrics.latency_ms = 999
+    hit.sources[0].meta["section"] = "Changed"
+
+    assert hit.cached_body() is None
+    data = json.loads(answer_response_json(hit))
+    assert data["metrics"]["latency_ms"] == 999
+    assert data["sources"][0]["meta"]["section"] == "Changed"